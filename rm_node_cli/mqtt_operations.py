@@ -3,47 +3,118 @@ MQTT operations for ESP RainMaker.
 """
 import paho.mqtt.client as mqtt
 import ssl
+import socket
 import json
 import time
 import logging
 import os
 import asyncio
+import functools
 from pathlib import Path
 import AWSIoTPythonSDK
 from AWSIoTPythonSDK.MQTTLib import AWSIoTMQTTClient
 from typing import Optional, Dict, Any, Callable
 import click
 import sys
+try:
+    import orjson
+except ImportError:  # Optional speed-up; stdlib json is used otherwise
+    orjson = None
 
 PORT = 443
 OPERATION_TIMEOUT = 30
 CONNECT_DISCONNECT_TIMEOUT = 20
 
 
+def _dumps(payload) -> str:
+    """Serialize a dict/list publish payload, with orjson when it is installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload).decode('utf-8')
+        except TypeError:
+            # Non-str keys or integers wider than 64 bits, which json accepts
+            pass
+    return json.dumps(payload)
+
+
+AWS_LOGGER_PREFIXES = ('AWSIoTPythonSDK', 'paho.mqtt')
+
+
+def _find_aws_loggers():
+    """Collect every registered AWS IoT SDK / paho logger in one scan."""
+    return tuple(
+        existing for name, existing in list(logging.Logger.manager.loggerDict.items())
+        if isinstance(existing, logging.Logger) and name.startswith(AWS_LOGGER_PREFIXES)
+    )
+
+
+# The SDK registers its loggers when imported above, so resolve them once here
+_AWS_LOGGERS = _find_aws_loggers()
+# Top of each logger hierarchy; loggers the SDK creates later inherit its level
+_AWS_ROOT_LOGGERS = tuple(logging.getLogger(prefix) for prefix in AWS_LOGGER_PREFIXES)
+
+
+def _quiet_aws_loggers(level):
+    """Set the level of the AWS IoT SDK / paho hierarchy roots and cached loggers."""
+    for existing in _AWS_ROOT_LOGGERS + _AWS_LOGGERS:
+        existing.setLevel(level)
+
+
+class _AWSLogFilter(logging.Filter):
+    """Handler filter that rejects records from AWS IoT SDK / paho loggers."""
+
+    def filter(self, record):
+        return not record.name.startswith(AWS_LOGGER_PREFIXES)
+
+
+_AWS_LOG_FILTER = _AWSLogFilter()
+
+
+def suppress_aws_logging():
+    """Silence AWS IoT SDK logging (used on shutdown).
+
+    Known loggers are disabled directly; the root handlers also get a prefix
+    filter so loggers the SDK creates later are caught as well.
+    """
+    for existing in _AWS_LOGGERS:
+        existing.disabled = True
+    for handler in logging.getLogger().handlers:
+        handler.addFilter(_AWS_LOG_FILTER)
+
+
 class MQTTOperationsException(Exception):
     """Class to handle MQTTOperations method exceptions."""
 
+
+@functools.lru_cache(maxsize=None)
+def _root_ca_path(cert_dir: Path) -> Path:
+    """Root CA for certificates in cert_dir: its own root.pem, else the project's.
+
+    Cached per directory, since every node (and every reconnect attempt) in a
+    certificate directory resolves the same file. A missing CA raises and is
+    therefore looked up again next time.
+    """
+    root_path = cert_dir / 'root.pem'
+    if not root_path.exists():
+        script_dir = Path(__file__).resolve().parent.parent
+        root_path = script_dir / 'certs' / 'root.pem'
+    if not root_path.exists():
+        raise MQTTOperationsException(f"Root CA certificate not found at {root_path}")
+    return root_path
+
 class MQTTOperations:
     """MQTT client operations."""
-    def __init__(self, broker, node_id, cert_path, key_path, root_path=None):
+    def __init__(self, broker, node_id, cert_path, key_path, root_path=None, on_disconnect=None):
         self.broker = broker
         self.node_id = node_id
         self.cert_path = cert_path
         self.key_path = key_path
+        # Called with no arguments from the SDK's thread whenever the connection drops
+        self.on_disconnect = on_disconnect
         
         # Use root.pem from the certificate directory or fallback to project's certs directory
         if not root_path:
-            # First try to find root.pem in the same directory as the node certificate
-            cert_dir = Path(cert_path).parent
-            root_path = cert_dir / 'root.pem'
-            
-            # If not found there, try the project's certs directory
-            if not root_path.exists():
-                script_dir = Path(__file__).resolve().parent.parent
-                root_path = script_dir / 'certs' / 'root.pem'
-                
-            if not root_path.exists():
-                raise MQTTOperationsException(f"Root CA certificate not found at {root_path}")
+            root_path = _root_ca_path(Path(cert_path).parent)
         
         self.root_path = str(root_path)
         self.mqtt_client = AWSIoTMQTTClient(node_id)
@@ -51,19 +122,13 @@ class MQTTOperations:
         self.old_msgs = {}
         self.logger = logging.getLogger("mqtt_cli")
         self.connected = False
-        self.last_ping = 0
+        # time.monotonic() of the last successful check; -inf forces the first one
+        self.last_ping = float('-inf')
         self.ping_interval = 30  # Check connection every 30 seconds
         self._connect_lock = asyncio.Lock()
 
         # Disable all AWS IoT SDK logging
-        for logger_name in ['AWSIoTPythonSDK', 
-                          'AWSIoTPythonSDK.core',
-                          'AWSIoTPythonSDK.core.protocol.internal.clients',
-                          'AWSIoTPythonSDK.core.protocol.mqtt_core',
-                          'AWSIoTPythonSDK.core.protocol.internal.workers',
-                          'AWSIoTPythonSDK.core.protocol.internal.defaults',
-                          'AWSIoTPythonSDK.core.protocol.internal.events']:
-            logging.getLogger(logger_name).setLevel(logging.ERROR)
+        _quiet_aws_loggers(logging.ERROR)
 
         self._configure_mqtt_client()
 
@@ -82,18 +147,35 @@ class MQTTOperations:
         self.mqtt_client.configureDrainingFrequency(2)  # Draining: 2 Hz
         self.mqtt_client.configureConnectDisconnectTimeout(10)  # 10 sec
         self.mqtt_client.configureMQTTOperationTimeout(30)  # 30 sec instead of 5 sec
+        self.mqtt_client.onOffline = self._handle_offline
+        self.mqtt_client.onOnline = self._handle_online
+
+    def _handle_online(self):
+        """SDK online callback: the connection is up again, e.g. after an auto-reconnect."""
+        self.connected = True
+
+    def _handle_offline(self):
+        """SDK offline callback: record the drop and notify the owner, if any."""
+        self.connected = False
+        if self.on_disconnect is not None:
+            try:
+                self.on_disconnect()
+            except Exception as e:
+                self.logger.debug(f"Disconnect callback for {self.node_id} failed: {str(e)}")
 
     async def _check_connection_async(self):
         """Check connection status asynchronously."""
         try:
             # Only check every ping_interval seconds
-            current_time = time.time()
+            current_time = time.monotonic()
             if current_time - self.last_ping < self.ping_interval:
                 return self.connected
                 
-            # Try to publish to a test topic
+            # Try to publish to a test topic; straight to the client, since
+            # publish_async() would come back here through is_connected_async()
             test_topic = f"$aws/things/{self.node_id}/ping"
-            result = await self.publish_async(test_topic, "", 0)
+            loop = asyncio.get_event_loop()
+            result = await loop.run_in_executor(None, self.mqtt_client.publish, test_topic, "", 0)
             
             self.connected = bool(result)
             self.last_ping = current_time
@@ -107,7 +189,7 @@ class MQTTOperations:
         """Check connection status by attempting to publish to a test topic."""
         try:
             # Only check every ping_interval seconds
-            current_time = time.time()
+            current_time = time.monotonic()
             if current_time - self.last_ping < self.ping_interval:
                 return self.connected
                 
@@ -132,8 +214,9 @@ class MQTTOperations:
                     loop = asyncio.get_event_loop()
                     result = await loop.run_in_executor(None, self.mqtt_client.connect)
                     if result:
+                        self._set_nodelay()
                         self.connected = True
-                        self.last_ping = time.time()
+                        self.last_ping = time.monotonic()
                     return result
                 return True
             except Exception as e:
@@ -146,8 +229,9 @@ class MQTTOperations:
             if not self.connected:
                 result = self.mqtt_client.connect()
                 if result:
+                    self._set_nodelay()
                     self.connected = True
-                    self.last_ping = time.time()
+                    self.last_ping = time.monotonic()
                 return result
             return True
         except Exception as e:
@@ -174,6 +258,32 @@ class MQTTOperations:
         except Exception as e:
             raise MQTTOperationsException(f"Failed to disconnect: {str(e)}")
 
+    def _socket(self):
+        """Return the SDK's underlying paho socket, or None if it is not reachable."""
+        try:
+            return self.mqtt_client._mqtt_core._internal_async_client._paho_client._sock
+        except AttributeError:
+            return None
+
+    def _set_nodelay(self):
+        """Disable Nagle's algorithm so small MQTT packets are sent immediately."""
+        sock = self._socket()
+        if sock is not None:
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except OSError as e:
+                self.logger.debug(f"Could not set TCP_NODELAY for {self.node_id}: {str(e)}")
+
+    def close_socket(self):
+        """Close the underlying socket without sending an MQTT DISCONNECT."""
+        try:
+            sock = self._socket()
+            if sock is not None:
+                sock.close()
+        except Exception:
+            pass
+        self.connected = False
+
     def is_connected(self):
         """Check if currently connected"""
         return self._check_connection()
@@ -189,7 +299,7 @@ class MQTTOperations:
                 await self.connect_async()
 
             if isinstance(payload, (dict, list)):
-                payload = json.dumps(payload)
+                payload = _dumps(payload)
 
             # Use QoS 0 for status updates to avoid waiting for acknowledgment
             if 'otastatus' in topic:
@@ -215,7 +325,7 @@ class MQTTOperations:
                 self.connect()
 
             if isinstance(payload, (dict, list)):
-                payload = json.dumps(payload)
+                payload = _dumps(payload)
 
             # Use QoS 0 for status updates to avoid waiting for acknowledgment
             if 'otastatus' in topic:
@@ -255,6 +365,41 @@ class MQTTOperations:
             self.logger.error(f"Subscribe failed: {str(e)}")
             raise MQTTOperationsException(f"Subscribe failed: {str(e)}")
 
+    async def subscribe_many_async(self, subscriptions):
+        """Subscribe to several (topic, qos, callback) entries, pipelining the requests.
+
+        Every SUBSCRIBE is sent before any SUBACK is awaited, so the acks overlap
+        and the whole set costs about one round-trip instead of one per topic.
+        Returns True if the broker granted every subscription.
+        """
+        try:
+            if not await self.is_connected_async():
+                await self.connect_async()
+
+            loop = asyncio.get_event_loop()
+            acks = []
+            for topic, qos, callback in subscriptions:
+                ack = loop.create_future()
+
+                def on_suback(mid, data, ack=ack):
+                    # Called on the SDK's callback thread
+                    loop.call_soon_threadsafe(lambda: ack.done() or ack.set_result(data))
+
+                self.mqtt_client.subscribeAsync(topic, int(qos), ackCallback=on_suback,
+                                                messageCallback=callback or self._on_message)
+                acks.append(ack)
+
+            granted = await asyncio.wait_for(asyncio.gather(*acks), timeout=OPERATION_TIMEOUT)
+            # A granted QoS of 128 (0x80) is the broker's failure code
+            result = all(128 not in (data if isinstance(data, (list, tuple)) else (data,))
+                         for data in granted)
+            if result:
+                self.logger.debug(f"Subscribed to {len(acks)} topics")
+            return result
+        except Exception as e:
+            self.logger.error(f"Subscribe failed: {str(e)}")
+            raise MQTTOperationsException(f"Subscribe failed: {str(e)}")
+
     def subscribe(self, topic, qos=1, callback=None):
         """Subscribe to a topic"""
         try:
@@ -335,11 +480,11 @@ class MQTTOperations:
     async def ping_async(self) -> bool:
         """Check if connection is alive and ping if needed asynchronously."""
         try:
-            current_time = time.time()
+            current_time = time.monotonic()
             if current_time - self.last_ping >= self.ping_interval:
                 # Publish a ping message to a temporary topic
                 ping_topic = f"node/{self.node_id}/ping"
-                if await self.publish_async(ping_topic, json.dumps({"timestamp": current_time}), 0):
+                if await self.publish_async(ping_topic, json.dumps({"timestamp": time.time()}), 0):
                     self.last_ping = current_time
                     return True
                 return False
@@ -350,11 +495,11 @@ class MQTTOperations:
     def ping(self) -> bool:
         """Check if connection is alive and ping if needed."""
         try:
-            current_time = time.time()
+            current_time = time.monotonic()
             if current_time - self.last_ping >= self.ping_interval:
                 # Publish a ping message to a temporary topic
                 ping_topic = f"node/{self.node_id}/ping"
-                if self.mqtt_client.publish(ping_topic, json.dumps({"timestamp": current_time}), 0):
+                if self.mqtt_client.publish(ping_topic, json.dumps({"timestamp": time.time()}), 0):
                     self.last_ping = current_time
                     return True
                 return False
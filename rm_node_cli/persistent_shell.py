@@ -13,6 +13,7 @@ import os
 import time
 import logging
 import readline
+import threading
 from datetime import datetime
 from typing import Optional, List, Dict, Any, Set
 from pathlib import Path
@@ -145,7 +146,7 @@ class PersistentShell:
                 ]
             },
             'utility': {
-                'commands': ['status', 'help', 'clear', 'disconnect', 'session-history', 'history', 'exit'],
+                'commands': ['status', 'help', 'clear', 'disconnect', 'session-history', 'history', 'tail', 'exit'],
                 'description': 'Shell utility commands',
                 'module': 'built-in',
                 'examples': [
@@ -156,6 +157,7 @@ class PersistentShell:
                     'disconnect --node-id node123',
                     'session-history',
                     'history',
+                    'tail 50 --node-id node123',
                     'exit'
                 ]
             }
@@ -195,6 +197,7 @@ class PersistentShell:
             'session-history': self._handle_session_history,
             'history': self._handle_history,
             'logs': self._handle_logs,
+            'tail': self._handle_tail,
             'exit': self._handle_exit,
             'quit': self._handle_exit,
         }
@@ -517,6 +520,30 @@ class PersistentShell:
         logger.debug(f"Using specific target nodes: {list(self.target_node_ids)}")
         return list(self.target_node_ids)
 
+    async def _read_input(self, prompt: str) -> str:
+        """Read a line on a daemon thread so the event loop keeps running.
+        
+        Keeping input() off the loop thread lets background tasks and the
+        loop's signal handlers run while the prompt is waiting.
+        """
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        
+        def deliver(setter, value):
+            if not future.done():
+                setter(value)
+        
+        def reader():
+            try:
+                line = input(prompt)
+            except BaseException as e:
+                loop.call_soon_threadsafe(deliver, future.set_exception, e)
+            else:
+                loop.call_soon_threadsafe(deliver, future.set_result, line)
+        
+        threading.Thread(target=reader, name="shell-input", daemon=True).start()
+        return await future
+
     async def run(self):
         """Run the interactive shell."""
         # Start background connection maintenance
@@ -538,7 +565,7 @@ class PersistentShell:
                 try:
                     # Get user input with readline support
                     try:
-                        command_line = input(self.get_prompt())
+                        command_line = await self._read_input(self.get_prompt())
                     except (EOFError, KeyboardInterrupt):
                         click.echo("\nExiting...")
                         break
@@ -714,6 +741,7 @@ class PersistentShell:
         click.echo("  status                  Show connection status")
         click.echo("  help                    Show this help")
         click.echo("  logs                    Check logs for troubleshooting")
+        click.echo("  tail                    Show recently received node messages")
         click.echo("  disconnect              Disconnect from nodes (all or specific)")
         click.echo("  exit                    Exit CLI")
         click.echo()
@@ -872,6 +900,7 @@ class PersistentShell:
             click.echo("  clear")
             click.echo("  disconnect [--node-id <node_id>]")
             click.echo("  session-history [--node-id <node_id>]")
+            click.echo("  tail [COUNT] [--node-id <node_id>] [--echo on|off]")
             click.echo("  exit")
             click.echo()
             click.echo(click.style("PARAMETERS:", fg='blue', bold=True))
@@ -886,6 +915,8 @@ class PersistentShell:
             click.echo("  disconnect --node-id 'node1,node2,node3'")
             click.echo("  session-history")
             click.echo("  session-history --node-id node123")
+            click.echo("  tail 50 --node-id node123")
+            click.echo("  tail --echo off")
             click.echo("  exit")
             click.echo()
             click.echo(click.style("DESCRIPTION:", fg='white', bold=True))
@@ -894,6 +925,7 @@ class PersistentShell:
             click.echo("  clear: Clear the terminal screen")
             click.echo("  disconnect: Disconnect from MQTT nodes (all or specific)")
             click.echo("  session-history: View connection session history")
+            click.echo("  tail: Show recently received node messages, or turn live echo on/off")
             click.echo("  exit: Exit the CLI (automatically disconnects from all nodes)")
             
         else:
@@ -1192,7 +1224,7 @@ class PersistentShell:
                 config['device_type'] = device_type
                 config['timestamp'] = int(time.time() * 1000)
                 
-                topic = f"node/{node_id}/config"
+                topic = self.manager.node_topic(node_id, "config")
                 logger.debug(f"Publishing to topic: {topic}")
                 
                 await self.manager.publish_to_node(node_id, topic, config)
@@ -1602,7 +1634,7 @@ class PersistentShell:
             success_count = 0
             for node_id in nodes:
                 try:
-                    topic = f"node/{node_id}/{topic_suffix}"
+                    topic = self.manager.node_topic(node_id, topic_suffix)
                     await self.manager.publish_to_node(node_id, topic, payload_json)
                     success_count += 1
                 except Exception as e:
@@ -1666,7 +1698,7 @@ class PersistentShell:
         
         for node_id in nodes:
             try:
-                topic = f"node/{node_id}/otafetch"
+                topic = self.manager.node_topic(node_id, "otafetch")
                 payload = {
                     "fw_version": version,
                     "timestamp": int(time.time() * 1000)
@@ -1779,7 +1811,7 @@ class PersistentShell:
                 }
                 
                 # Publish to OTA status topic
-                topic = f"node/{node_id}/otastatus"
+                topic = self.manager.node_topic(node_id, "otastatus")
                 await self.manager.publish_to_node(node_id, topic, json.dumps(payload))
                 
                 # Move job to history (except for in-progress status)
@@ -1995,12 +2027,12 @@ class PersistentShell:
                 
         # Confirm action
         if node_id:
-            confirm = input(f"Are you sure you want to clear OTA jobs for node {node_id}? (y/N): ").strip().lower()
+            confirm = (await self._read_input(f"Are you sure you want to clear OTA jobs for node {node_id}? (y/N): ")).strip().lower()
             if confirm != 'y':
                 click.echo("Operation cancelled")
                 return
         else:
-            confirm = input("Are you sure you want to clear ALL OTA jobs? (y/N): ").strip().lower()
+            confirm = (await self._read_input("Are you sure you want to clear ALL OTA jobs? (y/N): ")).strip().lower()
             if confirm != 'y':
                 click.echo("Operation cancelled")
                 return
@@ -2009,17 +2041,10 @@ class PersistentShell:
         self.manager.clear_ota_jobs(node_id)
         
         # Also clear history if clearing all or specific node
+        self.manager.clear_ota_status_history(node_id)
         if node_id:
-            # Clear history for specific node
-            history = self.manager.get_ota_status_history()
-            if node_id in history:
-                del history[node_id]
-                self.manager._save_ota_status_history()
             click.echo(click.style(f"✓ Cleared OTA jobs and history for node {node_id}", fg='green'))
         else:
-            # Clear all history
-            self.manager.ota_status_history = {}
-            self.manager._save_ota_status_history()
             click.echo(click.style("✓ Cleared all OTA jobs and history", fg='green'))
 
     # TSDATA Commands (flattened)
@@ -2195,11 +2220,11 @@ class PersistentShell:
             
             # Publish to target nodes using the official ESP RainMaker topic
             success_count = 0
+            payload_json = json.dumps(data)
             
             for node_id in nodes:
                 try:
-                    topic = f"node/{node_id}/{topic_suffix}"
-                    payload_json = json.dumps(data)
+                    topic = self.manager.node_topic(node_id, topic_suffix)
                     await self.manager.publish_to_node(node_id, topic, payload_json)
                     success_count += 1
                 except Exception as e:
@@ -2269,11 +2294,12 @@ class PersistentShell:
             "operation": "map",
             "timestamp": int(time.time() * 1000)
         }
+        payload_json = json.dumps(payload)
         
         success_count = 0
         for node_id in nodes:
             try:
-                await self.manager.publish_to_node(node_id, f"node/{node_id}/user/mapping", json.dumps(payload))
+                await self.manager.publish_to_node(node_id, self.manager.node_topic(node_id, "user/mapping"), payload_json)
                 success_count += 1
             except Exception as e:
                 click.echo(click.style(f"Failed to map user to {node_id}: {str(e)}", fg='red'))
@@ -2326,11 +2352,12 @@ class PersistentShell:
             "timestamp": int(time.time() * 1000),
             "type": "user_alert"
         }
+        payload_json = json.dumps(payload)
         
         success_count = 0
         for node_id in nodes:
             try:
-                await self.manager.publish_to_node(node_id, f"node/{node_id}/alert", json.dumps(payload))
+                await self.manager.publish_to_node(node_id, self.manager.node_topic(node_id, "alert"), payload_json)
                 success_count += 1
             except Exception as e:
                 click.echo(click.style(f"Failed to send alert to {node_id}: {str(e)}", fg='red'))
@@ -2395,7 +2422,7 @@ class PersistentShell:
             
             for node_id in nodes:
                 try:
-                    topic = f"node/{node_id}/from-node"
+                    topic = self.manager.node_topic(node_id, "from-node")
                     await self.manager.publish_to_node(node_id, topic, json_payload_str)
                     success_count += 1
                 except Exception as e:
@@ -2669,6 +2696,72 @@ class PersistentShell:
             if len(sorted_history) > 10:
                 click.echo(f"    ... and {len(sorted_history) - 10} more entries")
 
+    async def _handle_tail(self, args: List[str]):
+        """Handle tail command: tail [COUNT] [--node-id <node_id>] [--echo on|off]"""
+        if any(a in args for a in ['help', '--help', '-h']):
+            click.echo()
+            click.echo(click.style("┌─ TAIL Command Help", fg='green', bold=True))
+            click.echo("Show recently received node messages")
+            click.echo()
+            click.echo(click.style("USAGE:", fg='yellow', bold=True))
+            click.echo("  tail [COUNT] [--node-id <node_id>] [--echo on|off]")
+            click.echo()
+            click.echo(click.style("OPTIONS:", fg='blue', bold=True))
+            click.echo("  COUNT             Number of messages to show (default: 20; 0 shows none)")
+            click.echo("  --node-id TEXT    Optional: Show messages from specific node(s) only")
+            click.echo("  --echo on|off     Turn printing of messages as they arrive on or off")
+            click.echo("  --help            Show this message and exit")
+            click.echo()
+            click.echo(click.style("EXAMPLES:", fg='cyan', bold=True))
+            click.echo("  # Show the last 20 messages")
+            click.echo("  tail")
+            click.echo()
+            click.echo("  # Show the last 50 messages from one node")
+            click.echo("  tail 50 --node-id node123")
+            click.echo()
+            click.echo("  # Stop printing messages as they arrive")
+            click.echo("  tail --echo off")
+            click.echo()
+            return
+            
+        count = 20
+        node_ids = None
+        i = 0
+        while i < len(args):
+            if args[i] == '--node-id' and i+1 < len(args):
+                node_ids = {n.strip() for n in args[i+1].split(',') if n.strip()}
+                i += 2
+            elif args[i] == '--echo' and i+1 < len(args):
+                if args[i+1] not in ('on', 'off'):
+                    click.echo(click.style("--echo takes 'on' or 'off'", fg='red'))
+                    return
+                self.manager.echo_messages = args[i+1] == 'on'
+                click.echo(click.style(f"✓ Live message echo turned {args[i+1]}", fg='green'))
+                return
+            elif args[i].isdigit():
+                count = int(args[i])
+                i += 1
+            else:
+                i += 1
+                
+        # messages[-0:] would be the whole buffer
+        if count == 0:
+            return
+            
+        # Newest last; snapshot first since MQTT threads keep appending
+        messages = list(self.manager.messages)
+        if node_ids:
+            messages = [m for m in messages if m[1] in node_ids]
+        if not messages:
+            click.echo(click.style("No messages received yet", fg='yellow'))
+            return
+            
+        for received_ns, node_id, topic_suffix, payload in messages[-count:]:
+            timestamp = click.style(f"[{time.strftime('%H:%M:%S', time.localtime(received_ns // 1_000_000_000))}]", fg='blue')
+            node_color = click.style(f"[{node_id}]", fg='cyan')
+            topic_color = click.style(f"[{topic_suffix}]", fg='yellow')
+            click.echo(f"{timestamp} {node_color} {topic_color} {payload.decode('utf-8', 'replace')}")
+
     async def _handle_logs(self, args: List[str]):
         """Handle logs command: logs [OPTIONS]"""
         if any(a in args for a in ['help', '--help', '-h']):
@@ -2878,5 +2971,5 @@ async def start_interactive_shell(manager, config_dir: str = None):
     """Start the interactive shell with the given manager."""
     shell = PersistentShell(manager, config_dir)
     # Pass shell instance to manager for response storage
-    manager.shell = shell
+    manager.attach_shell(shell)
     await shell.run() 
\ No newline at end of file
@@ -11,47 +11,255 @@ This is the main entry point that:
 """
 
 import click
+import argparse
 import asyncio
 import json
 import sys
 import os
 import time
 import signal
+import random
 import logging
+import functools
 from pathlib import Path
-from typing import Optional, Dict, Any, List, Tuple
-from .mqtt_operations import MQTTOperations
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from typing import Optional, Dict, Any, List, Tuple, Mapping, Deque, TYPE_CHECKING
+try:
+    import orjson
+except ImportError:  # Optional speed-up; stdlib json is used otherwise
+    orjson = None
+try:
+    import uvloop
+except ImportError:  # Optional speed-up; the default asyncio loop is used otherwise
+    uvloop = None
 from .utils.config_manager import ConfigManager
-from .utils.connection_manager import ConnectionManager
+from .utils.ota_journal import OTAJournal
+from .utils.rate_limiter import AsyncRateLimiter
+from .utils.discovery_cache import DiscoveryCache
 from .utils.debug_logger import debug_log, debug_step
 from .utils.exceptions import MQTTConnectionError
-from .utils.cert_finder import find_node_cert_key_pairs, find_by_mac_address, find_certificates_in_directory
-from .utils.logger import setup_logging, get_logger, log_crash, log_monitoring_issue
+from .utils.cert_finder import find_node_cert_key_pairs, find_by_mac_address, find_certificates_in_directory, tree_signature
+from .utils.logger import setup_logging, log_crash, log_monitoring_issue
+
+if TYPE_CHECKING:
+    # Imported lazily at runtime: it loads the AWS IoT SDK, paho and ssl, which
+    # --help and argument errors never need
+    from .mqtt_operations import MQTTOperations
 
 # Get logger
 logger = logging.getLogger(__name__)
+# Same logger as RMNodeLogger.mqtt_logger, resolved once rather than per connect
+mqtt_logger = logging.getLogger("rm_node_cli.mqtt")
+
+# Shared read-only view returned for nodes without OTA entries
+_EMPTY_MAPPING = MappingProxyType({})
+
+# Parses MQTT payload bytes directly; orjson's decode error subclasses json.JSONDecodeError
+_loads = orjson.loads if orjson is not None else json.loads
+
+# Pre-bound time helpers for OTA bookkeeping
+_strftime = time.strftime
+_localtime = time.localtime
+_time_ns = time.time_ns
+
+# Status lines printed per node or per message, styled once; fill with str.format
+_STORED_OTA_JOB = click.style("✓ Stored OTA job {} for {}", fg='green')
+_STORED_NODE_RESPONSE = click.style("✓ Stored node response for {}", fg='green')
+_STORED_REMOTE_PARAMS = click.style("✓ Stored remote params for {}", fg='green')
+_CONNECTED_TO = click.style("✓ Connected to {}", fg='green')
+_CONNECT_FAILED = click.style("✗ Failed to connect to {} after {} attempts", fg='red')
 
 # Global shutdown event
 shutdown_event = asyncio.Event()
 
+# Upper bound on how long shutdown waits for node disconnects and leftover tasks (seconds)
+SHUTDOWN_TIMEOUT = 1.0
+
+# Threads for blocking MQTT calls, i.e. how many TLS handshakes run at once on startup
+MQTT_IO_WORKERS = 64
+
+# Cap on connect attempts per second, across startup, retries and reconnects
+CONNECT_RATE = 100
+
+# Nodes being connected at once on startup; matches the threads available for handshakes
+CONNECT_WORKERS = MQTT_IO_WORKERS
+
+# Startup connects report progress once per this many nodes instead of a line per node
+CONNECT_PROGRESS_EVERY = 50
+
+# Bounds (seconds) of the jittered delay between connect retries for one node
+CONNECT_RETRY_BASE = 2
+CONNECT_RETRY_CAP = 30
+
+# Connection checks issued at once by the maintenance sweep
+HEALTH_CHECK_BATCH = 256
+
+# Seconds between reconnect sweeps, doubled per failed sweep up to 2**RECONNECT_BACKOFF_MAX_EXP times
+RECONNECT_INTERVAL = 30
+RECONNECT_BACKOFF_MAX_EXP = 4
+
+# Nodes subscribed concurrently per batch, and the cap on subscribe requests per second
+SUBSCRIBE_BATCH_SIZE = 20
+SUBSCRIBE_RATE = 300
+
+# (topic suffix, QoS) monitored on every connected node
+LISTEN_TOPICS: Tuple[Tuple[str, int], ...] = (
+    ("params/remote", 1),   # Parameter responses from nodes
+    ("otaurl", 1),          # OTA URL responses from nodes
+    ("to-node", 1),         # Command requests to nodes (we monitor)
+)
+
+# Upper bound on publishes in flight at once in publish_to_all()
+PUBLISH_CONCURRENCY = 64
+
+# Number of received node messages kept for the shell's tail command
+MESSAGE_HISTORY_SIZE = 10000
+
+def _handle_ota_response(manager: 'RMNodeManager', node_id: str, payload: bytes):
+    """Store the OTA job announced on a node's otaurl topic."""
+    try:
+        ota_response = _loads(payload)
+        if manager.store_ota_job(node_id, ota_response):
+            manager.echo_line(_STORED_OTA_JOB.format(ota_response.get('ota_job_id', 'unknown'), node_id))
+    except json.JSONDecodeError:
+        logger.debug(f"Invalid JSON in OTA response from {node_id}")
+    except Exception as e:
+        logger.debug(f"Error processing OTA response from {node_id}: {str(e)}")
+
+def _handle_node_response(manager: 'RMNodeManager', node_id: str, payload: bytes):
+    """Store a node response from the to-node topic in the shell, if one is attached."""
+    try:
+        response_data = _loads(payload)
+        # Store in persistent shell if available
+        store = manager.store_node_response
+        if store is not None:
+            store(node_id, response_data)
+            manager.echo_line(_STORED_NODE_RESPONSE.format(node_id))
+    except json.JSONDecodeError:
+        logger.debug(f"Invalid JSON in node response from {node_id}")
+    except Exception as e:
+        logger.debug(f"Error processing node response from {node_id}: {str(e)}")
+
+def _handle_remote_params(manager: 'RMNodeManager', node_id: str, payload: bytes):
+    """Store remote parameters from the params/remote topic in the shell, if one is attached."""
+    try:
+        params_data = _loads(payload)
+        # Store in persistent shell if available
+        store = manager.store_remote_params
+        if store is not None:
+            store(node_id, params_data)
+            manager.echo_line(_STORED_REMOTE_PARAMS.format(node_id))
+    except json.JSONDecodeError:
+        logger.debug(f"Invalid JSON in remote params from {node_id}")
+    except Exception as e:
+        logger.debug(f"Error processing remote params from {node_id}: {str(e)}")
+
+# Per-topic processing after a message has been echoed
+_TOPIC_HANDLERS = {
+    "otaurl": _handle_ota_response,
+    "to-node": _handle_node_response,
+    "params/remote": _handle_remote_params,
+}
+
+def _decorrelated_jitter(previous: float) -> float:
+    """Next retry delay: uniform between the base and three times the previous delay, capped.
+
+    Nodes that failed together (e.g. on a broker restart) spread their retries
+    out instead of all coming back after the same fixed delay.
+    """
+    return min(CONNECT_RETRY_CAP, random.uniform(CONNECT_RETRY_BASE, previous * 3))
+
+@functools.lru_cache(maxsize=2)
+def _timestamp_prefix(second: int) -> str:
+    """Styled [HH:MM:SS] prefix for a message, built once per second."""
+    return click.style(f"[{_strftime('%H:%M:%S', _localtime(second))}]", fg='blue')
+
+class _MessageHandler:
+    """MQTT subscription callback for one node and topic."""
+    
+    __slots__ = ('manager', 'node_id', 'topic_suffix', '_handle', '_prefix')
+    
+    def __init__(self, manager: 'RMNodeManager', node_id: str, topic_suffix: str):
+        self.manager = manager
+        self.node_id = node_id
+        self.topic_suffix = topic_suffix
+        # Resolved once here instead of comparing topics on every message
+        self._handle = _TOPIC_HANDLERS.get(topic_suffix)
+        self._prefix = f"{click.style(f'[{node_id}]', fg='cyan')} {click.style(f'[{topic_suffix}]', fg='yellow')}"
+        
+    def __call__(self, client, userdata, message):
+        try:
+            payload = message.payload
+            now_ns = _time_ns()
+            self.manager.messages.append((now_ns, self.node_id, self.topic_suffix, payload))
+            if self.manager.echo_messages:
+                timestamp = _timestamp_prefix(now_ns // 1_000_000_000)
+                self.manager.echo_line(f"{timestamp} {self._prefix} {payload.decode('utf-8', 'replace')}")
+            
+            if self._handle is not None:
+                self._handle(self.manager, self.node_id, payload)
+        except Exception as e:
+            logger.debug(f"Error handling message from {self.node_id}: {str(e)}")
+
 class RMNodeManager:
     """Manages all node connections and background operations."""
     
     def __init__(self, config_dir: str):
         self.config_dir = config_dir
         self.config_manager = ConfigManager(config_dir)
-        self.connections: Dict[str, MQTTOperations] = {}
+        self.connections: Dict[str, 'MQTTOperations'] = {}
         self.broker_url: Optional[str] = None
         self.cert_paths: List[str] = []  # Support multiple paths
+        # Full topic strings per node, keyed by topic suffix
+        self._topic_cache: Dict[str, Dict[str, str]] = {}
+        # Discovery results per cert path, reused while the path's tree is unchanged
+        self._discovery_cache = DiscoveryCache(Path(config_dir) / "discovery_cache.json")
         self.running = True
         
+        # Interactive shell and its response stores, set by attach_shell()
+        self.shell = None
+        self.store_node_response = None
+        self.store_remote_params = None
+        
+        # Recently received node messages as (time_ns, node_id, topic_suffix, payload)
+        self.messages: Deque[Tuple[int, str, str, bytes]] = deque(maxlen=MESSAGE_HISTORY_SIZE)
+        # Echo each received message as it arrives; off when stdout is not a terminal
+        self.echo_messages = sys.stdout.isatty()
+        # Lines echoed from MQTT threads, written out in batches on the event loop
+        self._echo_lines: Deque[str] = deque()
+        self._echo_scheduled = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        # Drop sockets on shutdown instead of sending DISCONNECT per node
+        self._fast_kill = False
+        
+        # Set once cleanup() has run so repeated shutdown paths are no-ops
+        self._cleaned = False
+        
         # Background task for maintaining connections
         self.connection_task = None
         self.is_running = False
         
-        # OTA job storage - two files system
+        # Consecutive reconnect sweeps whose probe connect failed
+        self._failed_sweeps = 0
+        
+        # Pace connect and subscribe requests to the broker
+        self._connect_limiter = AsyncRateLimiter(CONNECT_RATE)
+        self._subscribe_limiter = AsyncRateLimiter(SUBSCRIBE_RATE)
+        
+        # Single background worker for fire-and-forget disconnects
+        self._disconnect_queue: Optional[asyncio.Queue] = None
+        self._disconnect_worker = None
+        
+        # OTA job storage - two stores, each per-node JSON snapshots plus an append-only log
         self.ota_jobs_file = os.path.join(config_dir, "ota_jobs.json")
         self.ota_status_history_file = os.path.join(config_dir, "ota_status_history.json")
+        self._ota_jobs_journal = OTAJournal(self.ota_jobs_file)
+        self._ota_history_journal = OTAJournal(self.ota_status_history_file)
+        # Single writer thread so snapshot I/O never runs on the loop or MQTT threads
+        self._io_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ota-io")
         self.ota_jobs = self._load_ota_jobs()
         self.ota_status_history = self._load_ota_status_history()
         
@@ -61,69 +269,87 @@ class RMNodeManager:
         if not self.cert_paths:
             raise Exception("Certificate paths not set")
             
-        all_nodes = []
+        # Discovery methods in order of preference for a node found by several
+        finders = (
+            (find_by_mac_address, "MAC directory structure"),
+            (find_certificates_in_directory, "directory structure"),
+            (find_node_cert_key_pairs, "node_details structure"),
+        )
+        
+        # Discovered nodes keyed by node_id, with the rank of the method that found them
+        unique_nodes: Dict[str, Tuple[int, tuple]] = {}
+        
+        from concurrent.futures import as_completed
         
-        # Import threading modules
-        import threading
-        from concurrent.futures import ThreadPoolExecutor, as_completed
+        def merge(path: str, rank: int, found: List[tuple]):
+            """Fold one method's results in; the preferred method wins, ties go to the first seen."""
+            for node_id, cert_path, key_path in found:
+                known = unique_nodes.get(node_id)
+                if known is None or rank < known[0]:
+                    unique_nodes[node_id] = (rank, (node_id, cert_path, key_path))
+            logger.debug(f"Completed discovery in {path}: {len(found)} nodes found")
         
-        def discover_nodes_in_path(cert_path: str) -> List[tuple]:
-            """Discover nodes in a single certificate path."""
+        def path_signature(cert_path: str) -> Optional[str]:
+            """Fingerprint a certificate path, or None if it cannot be read."""
             try:
-                path_nodes = []
-                cert_path_obj = Path(cert_path)
-                
-                # Method 1: Try MAC address directory structure first
-                logger.debug(f"Trying MAC address directory structure in {cert_path}")
-                mac_results = find_by_mac_address(cert_path_obj)
-                if mac_results:
-                    logger.debug(f"Found {len(mac_results)} nodes in MAC directory structure in {cert_path}")
-                    path_nodes.extend(mac_results)
-                
-                # Method 2: Try node_details structure
-                logger.debug(f"Trying node_details structure in {cert_path}")
-                try:
-                    # First check if we're already in a node_details structure
-                    cert_pairs = find_certificates_in_directory(cert_path_obj)
-                    if cert_pairs:
-                        logger.debug(f"Found {len(cert_pairs)} nodes in directory structure in {cert_path}")
-                        path_nodes.extend(cert_pairs)
-                        
-                    # Then try traditional node_details search
-                    node_pairs = find_node_cert_key_pairs(cert_path)
-                    if node_pairs:
-                        logger.debug(f"Found {len(node_pairs)} nodes in node_details structure in {cert_path}")
-                        path_nodes.extend(node_pairs)
-                except Exception as e:
-                    logger.debug(f"Error in node_details search in {cert_path}: {str(e)}")
-                
-                return path_nodes
+                return tree_signature(cert_path)
             except Exception as e:
-                logger.debug(f"Error discovering nodes in {cert_path}: {str(e)}")
-                return []
+                logger.debug(f"Error fingerprinting {cert_path}: {str(e)}")
+                return None
         
-        # Use ThreadPoolExecutor to discover nodes in parallel
-        with ThreadPoolExecutor(max_workers=min(len(self.cert_paths), 4)) as executor:
-            # Submit all discovery tasks
-            future_to_path = {executor.submit(discover_nodes_in_path, path): path for path in self.cert_paths}
+        def discover_nodes_with(cert_path: str, finder, description: str) -> Optional[List[tuple]]:
+            """Discover nodes in a single certificate path with one method; None on error."""
+            try:
+                logger.debug(f"Trying {description} in {cert_path}")
+                found = finder(Path(cert_path))
+                if found:
+                    logger.debug(f"Found {len(found)} nodes in {description} in {cert_path}")
+                return found or []
+            except Exception as e:
+                logger.debug(f"Error in {description} search in {cert_path}: {str(e)}")
+                return None
+        
+        # Every (path, method) pair is independent, I/O-bound work
+        task_count = len(self.cert_paths) * len(finders)
+        max_workers = min(task_count, (os.cpu_count() or 4) * 2)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Reuse cached results for paths whose directory tree is unchanged
+            signatures = dict(zip(self.cert_paths, executor.map(path_signature, self.cert_paths)))
+            stale_paths = []
+            for path, signature in signatures.items():
+                cached = self._discovery_cache.get(path, signature) if signature else None
+                if cached is None:
+                    stale_paths.append(path)
+                    continue
+                logger.debug(f"Using cached discovery results for {path}")
+                for rank, found in enumerate(cached):
+                    merge(path, rank, found)
+            
+            # Submit discovery tasks for the remaining paths
+            future_to_task = {
+                executor.submit(discover_nodes_with, path, finder, description): (path, rank)
+                for path in stale_paths
+                for rank, (finder, description) in enumerate(finders)
+            }
+            rescanned: Dict[str, List[Optional[List[tuple]]]] = {path: [None] * len(finders) for path in stale_paths}
             
-            # Collect results as they complete
-            for future in as_completed(future_to_path):
-                path = future_to_path[future]
+            # Collect results as they complete; merged on this thread, so no lock is needed
+            for future in as_completed(future_to_task):
+                path, rank = future_to_task[future]
                 try:
-                    path_nodes = future.result()
-                    all_nodes.extend(path_nodes)
-                    logger.debug(f"Completed discovery in {path}: {len(path_nodes)} nodes found")
+                    found = future.result()
+                    rescanned[path][rank] = found
+                    merge(path, rank, found or [])
                 except Exception as e:
                     logger.debug(f"Error in discovery thread for {path}: {str(e)}")
         
-        # Remove duplicates based on node_id
-        unique_nodes = {}
-        for node_id, cert_path, key_path in all_nodes:
-            if node_id not in unique_nodes:
-                unique_nodes[node_id] = (node_id, cert_path, key_path)
+        # Cache only complete scans, so a failed method is retried next time
+        for path, results in rescanned.items():
+            if signatures[path] and all(found is not None for found in results):
+                self._discovery_cache.put(path, signatures[path], results)
+        self._discovery_cache.save()
         
-        final_nodes = list(unique_nodes.values())
+        final_nodes = [node for _, node in unique_nodes.values()]
         
         if not final_nodes:
             paths_str = ", ".join(self.cert_paths)
@@ -138,17 +364,38 @@ class RMNodeManager:
         try:
             nodes = self.discover_nodes()
             
-            # Create connection tasks for all nodes
-            connection_tasks = []
-            for node_id, cert_path, key_path in nodes:
-                task = self._connect_node(node_id, cert_path, key_path)
-                connection_tasks.append(task)
-                
-            # Wait for all connections to complete
-            results = await asyncio.gather(*connection_tasks, return_exceptions=True)
+            # A fixed set of workers pulls nodes off one shared iterator, so only
+            # CONNECT_WORKERS connects are pending at once however many nodes there are
+            results: List[Any] = [False] * len(nodes)
+            pending = iter(enumerate(nodes))
+            done = 0
+            
+            async def worker():
+                nonlocal done
+                for index, (node_id, cert_path, key_path) in pending:
+                    try:
+                        results[index] = await self._connect_node(node_id, cert_path, key_path,
+                                                                   persist=False, announce=False)
+                    except Exception as e:
+                        results[index] = e
+                    done += 1
+                    if done % CONNECT_PROGRESS_EVERY == 0 and done < len(nodes):
+                        click.echo(f"Connecting... {done}/{len(nodes)} nodes attempted")
+            
+            await asyncio.gather(*(worker() for _ in range(min(CONNECT_WORKERS, len(nodes)))))
+            
+            # Store node configs for the connected nodes in one write
+            try:
+                skipped = self.config_manager.add_nodes(
+                    [node for node, result in zip(nodes, results) if result is True]
+                )
+                for node_id, error in skipped.items():
+                    logger.warning(f"Not storing config for {node_id}: {error}")
+            except Exception as e:
+                logger.warning(f"Error storing node configs: {str(e)}")
             
             # Count successful connections
-            connected_count = sum(1 for result in results if result)
+            connected_count = sum(1 for result in results if result is True)
             
             if connected_count == 0:
                 click.echo(click.style("✗ No nodes connected successfully", fg='red'))
@@ -162,21 +409,24 @@ class RMNodeManager:
             click.echo(click.style(f"✗ Error: {str(e)}", fg='red'))
             return 0, 0
 
-    async def _connect_node(self, node_id: str, cert_path: str, key_path: str) -> bool:
-        """Connect to a single node asynchronously with retry logic."""
+    async def _connect_node(self, node_id: str, cert_path: str, key_path: str,
+                            persist: bool = True, announce: bool = True) -> bool:
+        """Connect to a single node asynchronously with retry logic.
+        
+        With persist=False the caller is responsible for storing the node config.
+        With announce=False nothing is echoed per node; retries and failures
+        only go to the MQTT log and the caller reports progress.
+        """
         max_retries = 3
-        retry_delay = 2  # seconds
+        retry_delay = CONNECT_RETRY_BASE  # seconds
         
-        # Get logger for connection logging
-        try:
-            logger_instance = get_logger()
-            mqtt_logger = logger_instance.mqtt_logger
-        except:
-            mqtt_logger = logging.getLogger("rm_node_cli.mqtt")
+        # Loaded on first use (see TYPE_CHECKING above); once per node, not per attempt
+        from .mqtt_operations import MQTTOperations
         
         for attempt in range(max_retries):
             try:
-                mqtt_logger.debug(f"Connecting to node: {node_id} (attempt {attempt + 1}/{max_retries})")
+                if mqtt_logger.isEnabledFor(logging.DEBUG):
+                    mqtt_logger.debug(f"Connecting to node: {node_id} (attempt {attempt + 1}/{max_retries})")
                 
                 # Create MQTT client for this node
                 mqtt_client = MQTTOperations(
@@ -187,35 +437,45 @@ class RMNodeManager:
                 )
                 
                 # Connect asynchronously
+                await self._connect_limiter.acquire()
                 if await mqtt_client.connect_async():
+                    # Retire any stale client being replaced by this reconnect
+                    old_client = self.connections.get(node_id)
+                    if old_client is not None and old_client is not mqtt_client:
+                        self._queue_disconnect(old_client)
                     self.connections[node_id] = mqtt_client
                     # Store node config
-                    self.config_manager.add_node(node_id, cert_path, key_path)
-                    click.echo(click.style(f"✓ Connected to {node_id}", fg='green'))
+                    if persist:
+                        self.config_manager.add_node(node_id, cert_path, key_path)
+                    if announce:
+                        click.echo(_CONNECTED_TO.format(node_id))
                     return True
                 else:
                     if attempt < max_retries - 1:
-                        click.echo(click.style(f"✗ Failed to connect to {node_id} (attempt {attempt + 1}/{max_retries}), retrying in {retry_delay}s...", fg='yellow'))
+                        retry_delay = _decorrelated_jitter(retry_delay)
+                        if announce:
+                            click.echo(click.style(f"✗ Failed to connect to {node_id} (attempt {attempt + 1}/{max_retries}), retrying in {retry_delay:.1f}s...", fg='yellow'))
                         await asyncio.sleep(retry_delay)
                     else:
-                        click.echo(click.style(f"✗ Failed to connect to {node_id} after {max_retries} attempts", fg='red'))
+                        if announce:
+                            click.echo(_CONNECT_FAILED.format(node_id, max_retries))
+                        else:
+                            mqtt_logger.warning("Failed to connect to %s after %d attempts", node_id, max_retries)
                         return False
                         
             except Exception as e:
-                mqtt_logger.debug(f"Error connecting to {node_id} (attempt {attempt + 1}/{max_retries}): {str(e)}")
-                
-                # Log connection issue
-                try:
-                    logger_instance.log_connection_issue(node_id, str(e), attempt + 1)
-                except:
-                    pass
+                # Connection issue, in the format of RMNodeLogger.log_connection_issue
+                mqtt_logger.warning("Connection issue for node %s: %s (retry %d)", node_id, e, attempt + 1)
                 
                 if attempt < max_retries - 1:
-                    click.echo(click.style(f"✗ Error connecting to {node_id} (attempt {attempt + 1}/{max_retries}): {str(e)}", fg='yellow'))
-                    click.echo(click.style(f"Retrying in {retry_delay}s...", fg='yellow'))
+                    retry_delay = _decorrelated_jitter(retry_delay)
+                    if announce:
+                        click.echo(click.style(f"✗ Error connecting to {node_id} (attempt {attempt + 1}/{max_retries}): {str(e)}", fg='yellow'))
+                        click.echo(click.style(f"Retrying in {retry_delay:.1f}s...", fg='yellow'))
                     await asyncio.sleep(retry_delay)
                 else:
-                    click.echo(click.style(f"✗ Failed to connect to {node_id} after {max_retries} attempts: {str(e)}", fg='red'))
+                    if announce:
+                        click.echo(click.style(f"✗ Failed to connect to {node_id} after {max_retries} attempts: {str(e)}", fg='red'))
                     return False
         
         return False
@@ -243,129 +503,116 @@ class RMNodeManager:
         """Background task to maintain connections to all nodes."""
         while self.is_running and not shutdown_event.is_set():
             try:
+                # Wait before each check; connect_all_nodes() has just connected
+                # every node, so sweeping again at startup is wasted work. The wait
+                # doubles after each sweep whose probe failed.
+                delay = RECONNECT_INTERVAL * 2 ** min(self._failed_sweeps, RECONNECT_BACKOFF_MAX_EXP)
+                try:
+                    await asyncio.wait_for(shutdown_event.wait(), timeout=delay)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+                
                 nodes = self.discover_nodes()
                 
-                # Check and reconnect disconnected nodes
-                for node_id, cert_path, key_path in nodes:
-                    if node_id not in self.connections or not self.connections[node_id].is_connected():
-                        logger.debug(f"Attempting to reconnect to {node_id}")
-                        await self._connect_node(node_id, cert_path, key_path)
+                # Check for disconnected nodes, a batch of liveness checks at a time
+                down = []
+                for start in range(0, len(nodes), HEALTH_CHECK_BATCH):
+                    batch = nodes[start:start + HEALTH_CHECK_BATCH]
+                    alive = await asyncio.gather(
+                        *(self._is_alive(node_id) for node_id, _, _ in batch),
+                        return_exceptions=True
+                    )
+                    down.extend(node for node, ok in zip(batch, alive) if ok is not True)
+                if not down:
+                    self._failed_sweeps = 0
+                    continue
                 
-                # Wait before next check
-                try:
-                    await asyncio.wait_for(shutdown_event.wait(), timeout=30)
-                except asyncio.TimeoutError:
+                # Half-open: one node (a different one each sweep) probes the broker,
+                # and the rest are only retried once it gets through
+                probe = down.pop(self._failed_sweeps % len(down))
+                logger.debug(f"Attempting to reconnect to {probe[0]}")
+                if not await self._connect_node(*probe):
+                    self._failed_sweeps += 1
+                    logger.debug(f"Reconnect probe failed; {len(down)} other nodes wait for the next sweep")
                     continue
+                self._failed_sweeps = 0
+                for node_id, cert_path, key_path in down:
+                    logger.debug(f"Attempting to reconnect to {node_id}")
+                    await self._connect_node(node_id, cert_path, key_path)
                 
             except Exception as e:
                 logger.error(f"Error in connection maintenance: {str(e)}")
                 await asyncio.sleep(5)  # Short delay on error
 
+    async def _is_alive(self, node_id: str) -> bool:
+        """Whether node_id has a client that passes its connection check."""
+        client = self.connections.get(node_id)
+        return client is not None and await client.is_connected_async()
+
+    async def _subscribe_node(self, node_id: str, mqtt_client: 'MQTTOperations') -> bool:
+        """Subscribe one node to LISTEN_TOPICS with pipelined requests."""
+        subscriptions = [
+            (self.node_topic(node_id, topic_suffix), qos, _MessageHandler(self, node_id, topic_suffix))
+            for topic_suffix, qos in LISTEN_TOPICS
+        ]
+        try:
+            for _ in subscriptions:
+                await self._subscribe_limiter.acquire()
+            if await mqtt_client.subscribe_many_async(subscriptions):
+                logger.debug(f"Subscribed to {len(subscriptions)} topics for {node_id}")
+                return True
+            logger.debug(f"Failed to subscribe to some topics for {node_id}")
+        except Exception as e:
+            logger.debug(f"Error subscribing to topics for {node_id}: {str(e)}")
+        return False
+
     @debug_step("Starting background listeners")
     async def start_background_listeners(self):
         """Start background listeners for all important topics."""
         if not self.connections:
             return
-            
-        # Topics to subscribe to for all nodes
-        topics = [
-            "params/remote",      # Parameter responses from nodes
-            "otaurl",            # OTA URL responses from nodes
-            "to-node",           # Command requests to nodes (we monitor)
-        ]
-        
-        def create_message_handler(node_id: str, topic_suffix: str):
-            """Create a message handler for a specific node and topic."""
-            def handler(client, userdata, message):
-                try:
-                    payload = message.payload.decode('utf-8')
-                    timestamp = click.style(f"[{time.strftime('%H:%M:%S')}]", fg='blue')
-                    node_color = click.style(f"[{node_id}]", fg='cyan')
-                    topic_color = click.style(f"[{topic_suffix}]", fg='yellow')
-                    click.echo(f"{timestamp} {node_color} {topic_color} {payload}")
-                    
-                    # Special handling for OTA URL responses
-                    if topic_suffix == "otaurl":
-                        try:
-                            ota_response = json.loads(payload)
-                            if self.store_ota_job(node_id, ota_response):
-                                click.echo(click.style(f"✓ Stored OTA job {ota_response.get('ota_job_id', 'unknown')} for {node_id}", fg='green'))
-                        except json.JSONDecodeError:
-                            logger.debug(f"Invalid JSON in OTA response from {node_id}")
-                        except Exception as e:
-                            logger.debug(f"Error processing OTA response from {node_id}: {str(e)}")
-                    
-                    # Store node responses from to-node topic
-                    elif topic_suffix == "to-node":
-                        try:
-                            response_data = json.loads(payload)
-                            # Store in persistent shell if available
-                            if hasattr(self, 'shell') and hasattr(self.shell, '_store_node_response'):
-                                self.shell._store_node_response(node_id, response_data)
-                                click.echo(click.style(f"✓ Stored node response for {node_id}", fg='green'))
-                        except json.JSONDecodeError:
-                            logger.debug(f"Invalid JSON in node response from {node_id}")
-                        except Exception as e:
-                            logger.debug(f"Error processing node response from {node_id}: {str(e)}")
-                    
-                    # Store remote parameters from params/remote topic
-                    elif topic_suffix == "params/remote":
-                        try:
-                            params_data = json.loads(payload)
-                            # Store in persistent shell if available
-                            if hasattr(self, 'shell') and hasattr(self.shell, '_store_remote_params'):
-                                self.shell._store_remote_params(node_id, params_data)
-                                click.echo(click.style(f"✓ Stored remote params for {node_id}", fg='green'))
-                        except json.JSONDecodeError:
-                            logger.debug(f"Invalid JSON in remote params from {node_id}")
-                        except Exception as e:
-                            logger.debug(f"Error processing remote params from {node_id}: {str(e)}")
-                            
-                except Exception as e:
-                    logger.debug(f"Error handling message from {node_id}: {str(e)}")
-            return handler
+        self._loop = asyncio.get_event_loop()
         
-        # Subscribe to all topics for all connected nodes
+        # Subscribe to all topics for all connected nodes, a batch of nodes at a time
         success_count = 0
-        for node_id, mqtt_client in self.connections.items():
-            node_success = True
-            for topic_suffix in topics:
-                full_topic = f"node/{node_id}/{topic_suffix}"
-                handler = create_message_handler(node_id, topic_suffix)
-                
-                try:
-                    if await mqtt_client.subscribe_async(full_topic, qos=1, callback=handler):
-                        logger.debug(f"Subscribed to {full_topic}")
-                    else:
-                        logger.debug(f"Failed to subscribe to {full_topic}")
-                        node_success = False
-                except Exception as e:
-                    logger.debug(f"Error subscribing to {full_topic}: {str(e)}")
-                    node_success = False
-            
-            if node_success:
-                success_count += 1
+        clients = list(self.connections.items())
+        for start in range(0, len(clients), SUBSCRIBE_BATCH_SIZE):
+            batch = clients[start:start + SUBSCRIBE_BATCH_SIZE]
+            results = await asyncio.gather(
+                *(self._subscribe_node(node_id, mqtt_client) for node_id, mqtt_client in batch),
+                return_exceptions=True
+            )
+            success_count += sum(1 for result in results if result is True)
                     
         # Show a single summary message
         if success_count == len(self.connections):
-            click.echo(click.style(f"✓ Started monitoring {len(topics)} topics on {success_count} connected nodes", fg='green'))
+            click.echo(click.style(f"✓ Started monitoring {len(LISTEN_TOPICS)} topics on {success_count} connected nodes", fg='green'))
         else:
             click.echo(click.style(f"⚠ Started monitoring with partial success: {success_count}/{len(self.connections)} nodes", fg='yellow'))
 
-    def publish_to_all(self, topic_suffix: str, payload: str, qos: int = 1) -> int:
-        """Publish message to all connected nodes."""
-        success_count = 0
-        for node_id, mqtt_client in self.connections.items():
-            full_topic = f"node/{node_id}/{topic_suffix}"
+    async def publish_to_all(self, topic_suffix: str, payload: str, qos: int = 1) -> int:
+        """Publish message to all connected nodes concurrently."""
+        semaphore = asyncio.Semaphore(PUBLISH_CONCURRENCY)
+        
+        async def publish_one(node_id: str, mqtt_client: 'MQTTOperations') -> bool:
+            full_topic = self.node_topic(node_id, topic_suffix)
             try:
-                if mqtt_client.publish(full_topic, payload, qos=qos):
-                    success_count += 1
+                async with semaphore:
+                    result = await mqtt_client.publish_async(full_topic, payload, qos=qos)
+                if result:
                     logger.debug(f"Published to {full_topic}")
                 else:
                     logger.debug(f"Failed to publish to {full_topic}")
+                return bool(result)
             except Exception as e:
                 logger.debug(f"Error publishing to {node_id}: {str(e)}")
-        return success_count
+                return False
+                
+        results = await asyncio.gather(
+            *(publish_one(node_id, mqtt_client) for node_id, mqtt_client in list(self.connections.items()))
+        )
+        return sum(results)
         
     async def publish_to_node(self, node_id: str, topic: str, payload, qos: int = 1) -> bool:
         """Publish message to specific node with retry logic."""
@@ -376,13 +623,18 @@ class RMNodeManager:
         retry_delay = 1  # seconds
         
         for attempt in range(max_retries):
+            # One lookup per attempt: a reconnect from the maintenance task may
+            # have replaced the client while we slept
+            client = self.connections.get(node_id)
+            if client is None:
+                return False
             try:
                 # Check if connection is still alive
-                if not self.connections[node_id].is_connected():
+                if not await client.is_connected_async():
                     logger.debug(f"Connection lost for {node_id}, attempting reconnect (attempt {attempt + 1}/{max_retries})")
                     # Try to reconnect using the existing client
                     try:
-                        if self.connections[node_id].reconnect():
+                        if await client.reconnect_async():
                             logger.debug(f"Successfully reconnected to {node_id}")
                         else:
                             if attempt < max_retries - 1:
@@ -400,7 +652,7 @@ class RMNodeManager:
                             return False
                 
                 # Try to publish
-                result = await self.connections[node_id].publish_async(topic, payload, qos=qos)
+                result = await client.publish_async(topic, payload, qos=qos)
                 if result:
                     return True
                 else:
@@ -420,45 +672,84 @@ class RMNodeManager:
         
         return False
             
+    def echo_line(self, line: str):
+        """Queue a console line from any thread; lines are written in batches on the loop."""
+        self._echo_lines.append(line)
+        if self._echo_scheduled:
+            return
+        self._echo_scheduled = True
+        try:
+            self._loop.call_soon_threadsafe(self._flush_echo)
+        except (AttributeError, RuntimeError):
+            # No loop yet, or it is already closed
+            self._flush_echo()
+            
+    def _flush_echo(self):
+        """Write every queued console line with a single echo."""
+        # Cleared before draining, so a line queued meanwhile schedules another flush
+        self._echo_scheduled = False
+        lines = []
+        while True:
+            try:
+                lines.append(self._echo_lines.popleft())
+            except IndexError:
+                break
+        if lines:
+            click.echo("\n".join(lines))
+            
+    def attach_shell(self, shell):
+        """Attach the interactive shell that stores node responses and remote params."""
+        self.shell = shell
+        # Bound once here so message handlers skip the attribute probes
+        self.store_node_response = getattr(shell, '_store_node_response', None)
+        self.store_remote_params = getattr(shell, '_store_remote_params', None)
+        
+    def node_topic(self, node_id: str, topic_suffix: str) -> str:
+        """Return the full MQTT topic node/<node_id>/<topic_suffix>, built once per pair."""
+        topics = self._topic_cache.get(node_id)
+        if topics is None:
+            topics = self._topic_cache[node_id] = {}
+        topic = topics.get(topic_suffix)
+        if topic is None:
+            topic = topics[topic_suffix] = f"node/{node_id}/{topic_suffix}"
+        return topic
+        
     def get_connected_nodes(self) -> List[str]:
-        """Get list of connected node IDs."""
-        return [node_id for node_id, client in self.connections.items() if client.is_connected()]
+        """Get list of connected node IDs.
+        
+        Reads each client's tracked connection state instead of probing it;
+        the maintenance task re-checks liveness every sweep.
+        """
+        return [node_id for node_id, client in self.connections.items() if client.connected]
         
     def _load_ota_jobs(self) -> Dict[str, Dict[str, Any]]:
-        """Load OTA jobs from JSON file."""
-        try:
-            if os.path.exists(self.ota_jobs_file):
-                with open(self.ota_jobs_file, 'r') as f:
-                    return json.load(f)
-        except Exception as e:
-            logger.debug(f"Error loading OTA jobs: {str(e)}")
-        return {}
+        """Load OTA jobs from the snapshot and replay its log."""
+        return self._ota_jobs_journal.load()
         
-    def _save_ota_jobs(self):
-        """Save OTA jobs to JSON file."""
-        try:
-            with open(self.ota_jobs_file, 'w') as f:
-                json.dump(self.ota_jobs, f, indent=2)
-        except Exception as e:
-            logger.debug(f"Error saving OTA jobs: {str(e)}")
-            
     def _load_ota_status_history(self) -> Dict[str, Dict[str, Any]]:
-        """Load OTA status history from JSON file."""
-        try:
-            if os.path.exists(self.ota_status_history_file):
-                with open(self.ota_status_history_file, 'r') as f:
-                    return json.load(f)
-        except Exception as e:
-            logger.debug(f"Error loading OTA status history: {str(e)}")
-        return {}
+        """Load OTA status history from the snapshot and replay its log."""
+        return self._ota_history_journal.load()
         
-    def _save_ota_status_history(self):
-        """Save OTA status history to JSON file."""
-        try:
-            with open(self.ota_status_history_file, 'w') as f:
-                json.dump(self.ota_status_history, f, indent=2)
-        except Exception as e:
-            logger.debug(f"Error saving OTA status history: {str(e)}")
+    def _compact_ota_if_needed(self):
+        """Fold long OTA logs back into their snapshots.
+        
+        Only the cheap capture runs on the calling thread; the shard writes go
+        to the OTA I/O thread so MQTT callbacks and the shell keep running.
+        """
+        stores = ((self._ota_jobs_journal, self.ota_jobs),
+                  (self._ota_history_journal, self.ota_status_history))
+        for journal, data in stores:
+            if not journal.needs_compaction:
+                continue
+            # Skipped while a previous write is in flight; retried on the next operation
+            pending = journal.begin_compaction(data, blocking=False)
+            if pending is not None:
+                self._io_executor.submit(journal.write_compaction, pending)
+            
+    def _close_ota_storage(self):
+        """Snapshot both OTA stores and close their logs."""
+        self._ota_jobs_journal.close(self.ota_jobs)
+        self._ota_history_journal.close(self.ota_status_history)
             
     def store_ota_job(self, node_id: str, ota_response: Dict[str, Any]):
         """Store OTA job information from response."""
@@ -469,19 +760,18 @@ class RMNodeManager:
                 logger.debug("No ota_job_id found in response")
                 return False
                 
-            # Initialize node entry if it doesn't exist
-            if node_id not in self.ota_jobs:
-                self.ota_jobs[node_id] = {}
-                
             # Store the OTA job with timestamp
-            self.ota_jobs[node_id][ota_job_id] = {
+            now_ms = _time_ns() // 1_000_000
+            job_data = {
                 **ota_response,
-                'timestamp': int(time.time() * 1000),
-                'received_at': time.strftime('%Y-%m-%d %H:%M:%S')
+                'timestamp': now_ms,
+                'received_at': _strftime('%Y-%m-%d %H:%M:%S', _localtime(now_ms // 1000))
             }
+            self.ota_jobs.setdefault(node_id, {})[ota_job_id] = job_data
             
-            # Save to file
-            self._save_ota_jobs()
+            # Append to the log
+            self._ota_jobs_journal.put(node_id, ota_job_id, job_data)
+            self._compact_ota_if_needed()
             
             logger.debug(f"Stored OTA job {ota_job_id} for node {node_id}")
             return True
@@ -490,60 +780,73 @@ class RMNodeManager:
             logger.debug(f"Error storing OTA job: {str(e)}")
             return False
             
-    def get_ota_jobs(self, node_id: Optional[str] = None) -> Dict[str, Any]:
-        """Get stored OTA jobs, optionally filtered by node ID."""
+    def get_ota_jobs(self, node_id: Optional[str] = None) -> Mapping[str, Any]:
+        """Get a read-only view of stored OTA jobs, optionally filtered by node ID.
+        
+        The view is not a copy: it tracks later changes, and callers must go
+        through the manager's methods to modify jobs.
+        """
         if node_id:
-            return self.ota_jobs.get(node_id, {})
-        return self.ota_jobs
+            jobs = self.ota_jobs.get(node_id)
+            return MappingProxyType(jobs) if jobs is not None else _EMPTY_MAPPING
+        return MappingProxyType(self.ota_jobs)
         
     def clear_ota_jobs(self, node_id: Optional[str] = None):
         """Clear OTA jobs, optionally for a specific node."""
         if node_id:
-            if node_id in self.ota_jobs:
-                del self.ota_jobs[node_id]
-                self._save_ota_jobs()
+            if self.ota_jobs.pop(node_id, None) is not None:
+                self._ota_jobs_journal.clear(node_id)
         else:
-            self.ota_jobs = {}
-            self._save_ota_jobs()
+            self.ota_jobs.clear()
+            self._ota_jobs_journal.clear()
             
     def move_ota_job_to_history(self, node_id: str, job_id: str, status: str):
         """Move OTA job from primary to history with status."""
-        if node_id in self.ota_jobs and job_id in self.ota_jobs[node_id]:
-            # Get the job data
-            job_data = self.ota_jobs[node_id][job_id].copy()
+        jobs = self.ota_jobs.get(node_id)
+        # Remove from primary; the popped record becomes the history entry
+        job_data = jobs.pop(job_id, None) if jobs else None
+        if job_data is not None:
+            # Clean up empty node entries
+            if not jobs:
+                del self.ota_jobs[node_id]
             
-            # Add status and timestamp
+            # Add status and timestamp (single clock read for both fields)
+            now_ms = _time_ns() // 1_000_000
             job_data['ota_status'] = status
-            job_data['status_timestamp'] = int(time.time() * 1000)
-            job_data['status_received_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
-            
-            # Initialize history entry if needed
-            if node_id not in self.ota_status_history:
-                self.ota_status_history[node_id] = {}
+            job_data['status_timestamp'] = now_ms
+            job_data['status_received_at'] = _strftime('%Y-%m-%d %H:%M:%S', _localtime(now_ms // 1000))
             
             # Move to history
-            self.ota_status_history[node_id][job_id] = job_data
+            self.ota_status_history.setdefault(node_id, {})[job_id] = job_data
             
-            # Remove from primary
-            del self.ota_jobs[node_id][job_id]
-            
-            # Clean up empty node entries
-            if not self.ota_jobs[node_id]:
-                del self.ota_jobs[node_id]
-            
-            # Save both files
-            self._save_ota_jobs()
-            self._save_ota_status_history()
+            # Append one entry to each log, history first: a crash in between
+            # leaves the job in both stores rather than in neither
+            self._ota_history_journal.put(node_id, job_id, job_data)
+            self._ota_jobs_journal.delete(node_id, job_id)
+            self._compact_ota_if_needed()
             
             logger.debug(f"Moved OTA job {job_id} for node {node_id} to history with status {status}")
             return True
         return False
         
-    def get_ota_status_history(self, node_id: Optional[str] = None) -> Dict[str, Any]:
-        """Get OTA status history, optionally filtered by node ID."""
+    def get_ota_status_history(self, node_id: Optional[str] = None) -> Mapping[str, Any]:
+        """Get a read-only view of OTA status history, optionally filtered by node ID.
+        
+        Like get_ota_jobs(), this is a live view rather than a copy.
+        """
         if node_id:
-            return self.ota_status_history.get(node_id, {})
-        return self.ota_status_history
+            history = self.ota_status_history.get(node_id)
+            return MappingProxyType(history) if history is not None else _EMPTY_MAPPING
+        return MappingProxyType(self.ota_status_history)
+        
+    def clear_ota_status_history(self, node_id: Optional[str] = None):
+        """Clear OTA status history, optionally for a specific node."""
+        if node_id:
+            if self.ota_status_history.pop(node_id, None) is not None:
+                self._ota_history_journal.clear(node_id)
+        else:
+            self.ota_status_history.clear()
+            self._ota_history_journal.clear()
 
     async def disconnect_all_nodes(self):
         """Disconnect from all connected nodes."""
@@ -553,61 +856,109 @@ class RMNodeManager:
             logger.debug("No connections to disconnect")
             return 0, 0
             
-        # Create disconnect tasks for all nodes
-        disconnect_tasks = []
-        for node_id in list(self.connections.keys()):
-            task = self._disconnect_single_node(node_id)
-            disconnect_tasks.append(task)
-            
-        if disconnect_tasks:
-            # Wait for all disconnect operations to complete
-            results = await asyncio.gather(*disconnect_tasks, return_exceptions=True)
-            
-            # Count successful disconnections
-            success_count = sum(1 for result in results if result and not isinstance(result, Exception))
-            failed_count = len(results) - success_count
-            
-            logger.debug(f"Disconnected from {success_count}/{len(results)} nodes")
-            return success_count, len(results)
+        # Swap in a fresh map; failed disconnects put their client back
+        connections, self.connections = self.connections, {}
         
-        return 0, 0
+        # Every client here connected at least once; its connected flag may be
+        # down only because the SDK is auto-reconnecting, so all of them are
+        # disconnected, in a single gather
+        results = await asyncio.gather(
+            *(self._disconnect_client(node_id, client) for node_id, client in connections.items()),
+            return_exceptions=True
+        )
+        
+        # Count successful disconnections
+        total_count = len(connections)
+        success_count = sum(1 for result in results if result is True)
+        
+        logger.debug(f"Disconnected from {success_count}/{total_count} nodes")
+        return success_count, total_count
 
     async def _disconnect_single_node(self, node_id: str) -> bool:
         """Disconnect from a single node."""
+        client = self.connections.pop(node_id, None)
+        if client is None:
+            logger.debug(f"Node {node_id} is not connected")
+            return False
+        return await self._disconnect_client(node_id, client)
+
+    async def _disconnect_client(self, node_id: str, client: 'MQTTOperations') -> bool:
+        """Disconnect a client already removed from connections; restore it on failure."""
         try:
-            if node_id in self.connections:
-                client = self.connections[node_id]
-                
-                # Disconnect the client
-                if await client.disconnect_async():
-                    # Remove from manager connections
-                    del self.connections[node_id]
-                    logger.debug(f"Successfully disconnected from {node_id}")
-                    return True
-                else:
-                    logger.debug(f"Failed to disconnect from {node_id}")
-                    return False
-            else:
-                logger.debug(f"Node {node_id} is not connected")
-                return False
+            if await client.disconnect_async():
+                logger.debug(f"Successfully disconnected from {node_id}")
+                return True
+            logger.debug(f"Failed to disconnect from {node_id}")
         except Exception as e:
             logger.error(f"Error disconnecting from {node_id}: {str(e)}")
-            return False
+        self.connections.setdefault(node_id, client)
+        return False
+
+    def _queue_disconnect(self, client: 'MQTTOperations'):
+        """Hand a client to the background disconnect worker without awaiting it."""
+        if self._disconnect_queue is None:
+            self._disconnect_queue = asyncio.Queue()
+            self._disconnect_worker = asyncio.create_task(self._disconnect_loop())
+        self._disconnect_queue.put_nowait(client)
+
+    async def _disconnect_loop(self):
+        """Background worker that disconnects queued clients one at a time."""
+        while True:
+            client = await self._disconnect_queue.get()
+            try:
+                await client.disconnect_async()
+            except Exception as e:
+                logger.debug(f"Error disconnecting retired client for {client.node_id}: {str(e)}")
+            finally:
+                self._disconnect_queue.task_done()
+
+    async def _stop_disconnect_worker(self):
+        """Cancel the background disconnect worker if it was started."""
+        if self._disconnect_worker:
+            self._disconnect_worker.cancel()
+            try:
+                await self._disconnect_worker
+            except asyncio.CancelledError:
+                pass
+            self._disconnect_worker = None
+            self._disconnect_queue = None
 
     async def cleanup(self):
         """Clean up by stopping background tasks and disconnecting from all nodes."""
+        if self._cleaned:
+            return
+        self._cleaned = True
         logger.debug("Starting cleanup...")
         self.running = False
         
         # Set shutdown event to stop background tasks
         shutdown_event.set()
         
-        # Disconnect from all nodes
-        success_count, total_count = await self.disconnect_all_nodes()
-        logger.debug(f"Disconnected from {success_count}/{total_count} nodes during cleanup")
+        if self._fast_kill:
+            # Close sockets directly; the broker reaps the sessions on keep-alive expiry
+            for client in self.connections.values():
+                client.close_socket()
+            logger.debug(f"Closed {len(self.connections)} sockets during cleanup")
+            self.connections.clear()
+        else:
+            # Disconnect from all nodes; bounded, since each DISCONNECT may take up
+            # to the SDK's disconnect timeout
+            try:
+                success_count, total_count = await asyncio.wait_for(
+                    self.disconnect_all_nodes(), timeout=SHUTDOWN_TIMEOUT
+                )
+                logger.debug(f"Disconnected from {success_count}/{total_count} nodes during cleanup")
+            except asyncio.TimeoutError:
+                logger.debug("Node disconnects did not finish within the shutdown deadline")
         
         # Stop background connections
         await self.stop_background_connections()
+        await self._stop_disconnect_worker()
+        
+        # Fold OTA logs into their snapshots on the I/O thread, after any pending
+        # write; never cut short, or stored OTA jobs would only survive in the log
+        await asyncio.get_event_loop().run_in_executor(self._io_executor, self._close_ota_storage)
+        self._io_executor.shutdown(wait=False)
         
         logger.debug("Cleanup completed")
 
@@ -615,52 +966,95 @@ class RMNodeManager:
 manager: Optional[RMNodeManager] = None
 loop: Optional[asyncio.AbstractEventLoop] = None
 
+# Set on the first shutdown request (e.g. SIGTERM followed by SIGINT)
+_exit_requested = False
+
 def handle_exception(loop, context):
     """Handle exceptions in the event loop."""
     msg = context.get("exception", context["message"])
     logger.error(f"Caught exception: {msg}")
 
+def _suppress_aws_logging():
+    """Silence the AWS IoT SDK loggers, if the SDK has been loaded at all."""
+    mqtt_operations = sys.modules.get(f"{__package__}.mqtt_operations")
+    if mqtt_operations is not None:
+        mqtt_operations.suppress_aws_logging()
+
 def cleanup_and_exit():
     """Clean up and exit the program."""
-    if manager and loop:
+    global _exit_requested
+    if _exit_requested:
+        # Shutdown is already unwinding; don't interrupt its cleanup
+        return
+    _exit_requested = True
+    
+    # Keep SDK disconnect noise off the console while shutting down
+    _suppress_aws_logging()
+    
+    # Signals that arrive while the loop runs go through request_shutdown()
+    # instead, so here the loop has stopped and can drive the cleanup itself
+    if manager and loop and not loop.is_running():
         try:
-            if loop.is_running():
-                # Schedule cleanup of background tasks
-                future = asyncio.run_coroutine_threadsafe(manager.cleanup(), loop)
-                # Wait briefly for cleanup
-                future.result(timeout=2)
-            else:
-                # If loop is not running, run cleanup directly
-                loop.run_until_complete(manager.cleanup())
+            loop.run_until_complete(manager.cleanup())
         except Exception as e:
             logger.error(f"Error during cleanup: {str(e)}")
     sys.exit(0)
 
-def signal_handler(signum, frame):
-    """Handle interrupt signals."""
-    click.echo("\nExiting...")
-    cleanup_and_exit()
-
-@click.command()
-@click.option('--cert-path', required=True, multiple=True,
-              help='Path to certificates directory containing node certificates (can specify multiple times)')
-@click.option('--broker-id', default='mqtts://a1p72mufdu6064-ats.iot.us-east-1.amazonaws.com/',
-              help='MQTT broker URL (default: mqtts://a1p72mufdu6064-ats.iot.us-east-1.amazonaws.com/)')
-@click.option('--config-dir', default='.rm-node',
-              help='Configuration directory (default: .rm-node)')
-@click.option('--debug', is_flag=True, help='Enable debug logging')
-@debug_log
-def main(cert_path: Tuple[str, ...], broker_id: str, config_dir: str, debug: bool):
-    """
-    RM-Node CLI - Efficient MQTT Node Management
+def _fallback_signal_handler(main_task: asyncio.Task, signum, frame):
+    """Signal handler for loops without add_signal_handler (e.g. on Windows).
     
-    Connect to all nodes and start an interactive shell for managing them.
-    
-    Examples:
-        rm-node --cert-path /path/to/certs
-        rm-node --cert-path /path/to/certs --broker-id mqtts://broker.example.com:8883
-        rm-node --cert-path /path1/certs --cert-path /path2/certs
+    Python runs it on the main thread between bytecodes, often inside the
+    loop's select, where raising would skip setup_and_run()'s cleanup; hand
+    the request to the loop instead.
     """
+    loop.call_soon_threadsafe(request_shutdown, main_task)
+
+def request_shutdown(main_task: asyncio.Task):
+    """Loop signal handler: cancel the main task so its finally block cleans up."""
+    global _exit_requested
+    if _exit_requested:
+        return
+    _exit_requested = True
+    
+    click.echo("\nExiting...")
+    _suppress_aws_logging()
+    main_task.cancel()
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser for the rm-node entry point."""
+    parser = argparse.ArgumentParser(
+        prog='rm-node',
+        description='RM-Node CLI - Efficient MQTT Node Management\n\n'
+                    'Connect to all nodes and start an interactive shell for managing them.',
+        epilog='Examples:\n'
+               '  rm-node --cert-path /path/to/certs\n'
+               '  rm-node --cert-path /path/to/certs --broker-id mqtts://broker.example.com:8883\n'
+               '  rm-node --cert-path /path1/certs --cert-path /path2/certs',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--cert-path', required=True, action='append',
+                        help='Path to certificates directory containing node certificates (can specify multiple times)')
+    parser.add_argument('--broker-id', default='mqtts://a1p72mufdu6064-ats.iot.us-east-1.amazonaws.com/',
+                        help='MQTT broker URL (default: mqtts://a1p72mufdu6064-ats.iot.us-east-1.amazonaws.com/)')
+    parser.add_argument('--config-dir', default='.rm-node',
+                        help='Configuration directory (default: .rm-node)')
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+    parser.add_argument('--fast-exit', action='store_true',
+                        help='On exit, close node sockets without sending MQTT DISCONNECT')
+    parser.add_argument('--no-uvloop', action='store_true',
+                        help='Use the default asyncio event loop even if uvloop is installed')
+    return parser
+
+def main(argv: Optional[List[str]] = None):
+    """Console entry point: parse the command line and run the CLI."""
+    args = build_parser().parse_args(argv)
+    run(tuple(args.cert_path), args.broker_id, args.config_dir, args.debug, args.fast_exit,
+        use_uvloop=not args.no_uvloop)
+
+@debug_log
+def run(cert_path: Tuple[str, ...], broker_id: str, config_dir: str, debug: bool, fast_exit: bool,
+        use_uvloop: bool = True):
+    """Connect to all nodes and start an interactive shell for managing them."""
     global manager, loop
     
     try:
@@ -677,24 +1071,37 @@ def main(cert_path: Tuple[str, ...], broker_id: str, config_dir: str, debug: boo
         manager = RMNodeManager(str(config_path))
         manager.broker_url = broker_id
         manager.cert_paths = list(cert_path)  # Store multiple paths
+        manager._fast_kill = fast_exit
         
         # Store configuration
-        manager.config_manager.set_broker(broker_id)
-        manager.config_manager.set_cert_paths(cert_path)  # Store multiple paths
+        with manager.config_manager.batch():
+            manager.config_manager.set_broker(broker_id)
+            manager.config_manager.set_cert_paths(cert_path)  # Store multiple paths
         
         app_logger.info("RM-Node CLI Starting...")
         app_logger.info(f"Certificate paths: {', '.join(cert_path)}")
         app_logger.info(f"Broker: {broker_id}")
         app_logger.info(f"Config directory: {config_path}")
         
-        click.echo(click.style("RM-Node CLI Starting...", fg='green', bold=True))
-        click.echo(f"Certificate paths: {', '.join(cert_path)}")
-        click.echo(f"Broker: {broker_id}")
-        click.echo(f"Config directory: {config_path}")
-        click.echo("-" * 60)
+        click.echo("\n".join((
+            click.style("RM-Node CLI Starting...", fg='green', bold=True),
+            f"Certificate paths: {', '.join(cert_path)}",
+            f"Broker: {broker_id}",
+            f"Config directory: {config_path}",
+            "-" * 60,
+        )))
         
         # Create event loop and run async operations
         async def setup_and_run():
+            # Deliver SIGINT/SIGTERM through the loop so shutdown runs between tasks
+            main_task = asyncio.current_task()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                try:
+                    loop.add_signal_handler(sig, request_shutdown, main_task)
+                except NotImplementedError:
+                    # Event loops on Windows have no add_signal_handler
+                    signal.signal(sig, functools.partial(_fallback_signal_handler, main_task))
+            
             try:
                 # Connect to all nodes
                 connected_count, total_nodes = await manager.connect_all_nodes()
@@ -714,18 +1121,31 @@ def main(cert_path: Tuple[str, ...], broker_id: str, config_dir: str, debug: boo
                 # Import and start the interactive shell
                 from .persistent_shell import start_interactive_shell
                 await start_interactive_shell(manager, str(config_path))
+            except asyncio.CancelledError:
+                app_logger.info("Shutdown requested by signal")
             finally:
-                # Ensure cleanup happens
+                # Cancel whatever else is still running (maintenance sweep, disconnect
+                # worker, in-flight connects or subscribes) so cleanup does not race it
+                pending = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+                for task in pending:
+                    task.cancel()
+                if pending:
+                    await asyncio.wait(pending, timeout=SHUTDOWN_TIMEOUT)
+                
+                # Ensure cleanup happens; it bounds its own disconnect phase
                 await manager.cleanup()
         
-        # Set up signal handlers
-        signal.signal(signal.SIGINT, signal_handler)
-        signal.signal(signal.SIGTERM, signal_handler)
-        
-        # Create and configure event loop
-        loop = asyncio.new_event_loop()
+        # Create and configure event loop (uvloop when installed, except on Windows)
+        if use_uvloop and uvloop is not None:
+            loop = uvloop.new_event_loop()
+            app_logger.debug("Using uvloop event loop")
+        else:
+            loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         loop.set_exception_handler(handle_exception)
+        # Blocking MQTT calls (connect, subscribe, publish) run on the default
+        # executor; size it so startup handshakes are not capped at cpu_count + 4
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=MQTT_IO_WORKERS, thread_name_prefix="mqtt-io"))
         
         # Run the async setup
         loop.run_until_complete(setup_and_run())
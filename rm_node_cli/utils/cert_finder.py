@@ -2,17 +2,103 @@
 Certificate finder utility for MQTT CLI.
 """
 import os
+import re
 import csv
 from datetime import datetime
 import click
 from pathlib import Path
-from typing import Optional, Tuple, List, Dict
+from typing import Optional, Tuple, List, Dict, Iterator
 import logging
+import functools
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from .debug_logger import debug_log, debug_step
 
 # Get logger for this module
 logger = logging.getLogger(__name__)
 
+# Runs of characters that are not letters or digits, stripped before looking for a MAC
+_NON_ALNUM_RE = re.compile(r'[\W_]+')
+# A MAC address: 12 hex digits at the start of the stripped file name
+_MAC_RE = re.compile(r'[0-9A-Fa-f]{12}')
+
+# Upper bound on how much of a node.info file is read
+NODE_INFO_MAX_BYTES = 512
+
+# Tooling directories that never hold node certificates; walks do not descend into them
+_SKIP_DIRS = frozenset({'.git', '.hg', '.svn', '__pycache__', 'node_modules', '.venv', 'venv', '.tox'})
+
+def _scandir_walk(top: str) -> Iterator[Tuple[str, List[os.DirEntry], Dict[str, os.DirEntry]]]:
+    """
+    Top-down directory walk built on a single os.scandir per directory.
+    Yields (dirpath, subdirectory entries, {file name: entry}) like os.walk, but
+    hands out the DirEntry objects so callers need no further stat calls. File
+    names keep directory listing order and support O(1) membership tests. Symlinked
+    directories and _SKIP_DIRS are listed but not descended into, and unreadable
+    directories are skipped. Callers may prune the subdirectory list in place.
+    """
+    dirs = []
+    files = {}
+    try:
+        with os.scandir(top) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    dirs.append(entry)
+                else:
+                    files[entry.name] = entry
+    except OSError:
+        return
+
+    yield top, dirs, files
+    for entry in dirs:
+        if entry.name not in _SKIP_DIRS and not entry.is_symlink():
+            yield from _scandir_walk(entry.path)
+
+def tree_signature(directory: str) -> str:
+    """
+    Fingerprint the directory tree under directory from its directory mtimes.
+    Walks the same directories as the certificate finders, so _SKIP_DIRS and
+    symlinked directories are left out.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    directory = os.fspath(directory)
+    try:
+        mtimes = {directory: os.stat(directory).st_mtime_ns}
+    except OSError:
+        return digest.hexdigest()
+    for dirpath, dirs, _ in _scandir_walk(directory):
+        # Sorted in place so the walk, and with it the digest, is deterministic
+        dirs.sort(key=lambda entry: entry.name)
+        digest.update(f"{dirpath}\0{mtimes.pop(dirpath, 0)}\n".encode('utf-8', 'surrogateescape'))
+        for entry in dirs:
+            if entry.name not in _SKIP_DIRS and not entry.is_symlink():
+                try:
+                    mtimes[entry.path] = entry.stat(follow_symlinks=False).st_mtime_ns
+                except OSError:
+                    pass
+    return digest.hexdigest()
+
+# Seconds a lookup reuses a path's tree signature, so a burst of per-node
+# lookups (e.g. one command connecting many nodes) walks the tree once
+TREE_SIGNATURE_TTL = 5.0
+
+_recent_signatures: Dict[str, Tuple[float, str]] = {}
+
+def _recent_tree_signature(base_path: str) -> str:
+    """tree_signature(base_path), reused for TREE_SIGNATURE_TTL seconds."""
+    now = time.monotonic()
+    recent = _recent_signatures.get(base_path)
+    if recent is not None and now - recent[0] < TREE_SIGNATURE_TTL:
+        return recent[1]
+    signature = tree_signature(base_path)
+    _recent_signatures[base_path] = (now, signature)
+    return signature
+
 @debug_step("Finding certificates in directory")
 def find_certificates_in_directory(directory: Path) -> List[Tuple[str, str, str]]:
     """
@@ -27,21 +113,16 @@ def find_certificates_in_directory(directory: Path) -> List[Tuple[str, str, str]
     """
     cert_pairs = []
     try:
-        # Walk through all subdirectories
-        for root, dirs, files in os.walk(directory):
-            root_path = Path(root)
-            
-            # Look for node.info first
-            node_info = root_path / 'node.info'
-            if node_info.exists():
-                node_id = read_node_info_file(node_info)
+        # Walk through all subdirectories; each directory's listing answers the existence checks
+        for root, _, files in _scandir_walk(os.fspath(directory)):
+            # Look for node.info first, then the certificate files next to it
+            if 'node.info' in files and 'node.crt' in files and 'node.key' in files:
+                node_id = read_node_info_file(os.path.join(root, 'node.info'))
                 if node_id:
-                    # Look for certificate files
-                    cert_path = root_path / 'node.crt'
-                    key_path = root_path / 'node.key'
-                    if cert_path.exists() and key_path.exists():
-                        cert_pairs.append((node_id, str(cert_path), str(key_path)))
-                        logger.debug(f"Found certificate pair for node {node_id} in {root_path}")
+                    cert_path = os.path.join(root, 'node.crt')
+                    key_path = os.path.join(root, 'node.key')
+                    cert_pairs.append((node_id, cert_path, key_path))
+                    logger.debug("Found certificate pair for node %s in %s", node_id, root)
                         
         logger.debug(f"Found {len(cert_pairs)} certificate pairs in directory {directory}")
         return cert_pairs
@@ -68,16 +149,15 @@ def read_mac_addresses_from_file(file_path: str) -> Dict[str, str]:
             return mac_dict
 
         # Walk through directory and subdirectories
-        for root, _, files in os.walk(base_path):
+        for root, _, files in _scandir_walk(os.fspath(base_path)):
             for file in files:
-                # Extract 12-digit MAC address from filename if present
-                mac_match = ''.join(c for c in file if c.isalnum())
-                if len(mac_match) >= 12:  # Look for potential MAC in filename
-                    mac_address = mac_match[:12].upper()  # Take first 12 chars
-                    if all(c in '0123456789ABCDEF' for c in mac_address):  # Validate hex
-                        file_path = str(Path(root) / file)
-                        mac_dict[mac_address] = file_path
-                        logger.debug(f"Found MAC address {mac_address} in file {file_path}")
+                # Extract 12-digit MAC address from the first 12 letters/digits of the filename
+                mac_match = _MAC_RE.match(_NON_ALNUM_RE.sub('', file))
+                if mac_match:
+                    mac_address = mac_match.group(0).upper()
+                    file_path = os.path.join(root, file)
+                    mac_dict[mac_address] = file_path
+                    logger.debug("Found MAC address %s in file %s", mac_address, file_path)
 
         logger.debug(f"Found {len(mac_dict)} MAC addresses in directory")
         return mac_dict
@@ -114,12 +194,13 @@ def read_node_info_file(file_path: Path) -> Optional[str]:
         str: node_id if found, None otherwise
     """
     try:
-        logger.debug(f"Reading node.info file: {file_path}")
-        with open(file_path, 'r') as f:
-            content = f.read().strip()
-            logger.debug(f"Found node_id: {content}")
+        logger.debug("Reading node.info file: %s", file_path)
+        with open(file_path, 'rb') as f:
+            # Node IDs are short; never slurp a large file placed under that name
+            content = f.read(NODE_INFO_MAX_BYTES).decode('utf-8', errors='replace').strip()
+            logger.debug("Found node_id: %s", content)
             return content
-    except Exception as e:
+    except OSError as e:
         logger.debug(f"Failed to read node.info file: {str(e)}")
         return None
 
@@ -138,26 +219,30 @@ def find_by_mac_address(directory: Path, node_id: str = None) -> List[Tuple[str,
     cert_pairs = []
     try:
         # Check immediate subdirectories for MAC address pattern
-        for item in directory.iterdir():
-            if not item.is_dir():
+        with os.scandir(directory) as it:
+            mac_dirs = [entry.path for entry in it
+                        # Directory name could be a MAC address (12 hex digits)
+                        if _MAC_RE.fullmatch(entry.name) and entry.is_dir()]
+
+        for item in mac_dirs:
+            logger.debug("Found potential MAC directory: %s", item)
+
+            # Look for certificates in a single listing of the directory;
+            # an unreadable (or vanished) directory only skips that node
+            try:
+                with os.scandir(item) as it:
+                    files = {entry.name for entry in it if entry.is_file()}
+            except OSError as e:
+                logger.debug(f"Error reading MAC directory {item}: {str(e)}")
                 continue
-                
-            # Check if directory name could be a MAC address (12 hex digits)
-            dir_name = item.name.upper()
-            if len(dir_name) == 12 and all(c in '0123456789ABCDEF' for c in dir_name):
-                logger.debug(f"Found potential MAC directory: {item}")
-                
-                # Look for certificates
-                node_info = item / 'node.info'
-                cert_path = item / 'node.crt'
-                key_path = item / 'node.key'
-                
-                if node_info.exists() and cert_path.exists() and key_path.exists():
-                    found_node_id = read_node_info_file(node_info)
-                    if found_node_id:
-                        if node_id is None or node_id == found_node_id:
-                            logger.debug(f"Found valid certificate pair for node {found_node_id}")
-                            cert_pairs.append((found_node_id, str(cert_path), str(key_path)))
+
+            if 'node.info' in files and 'node.crt' in files and 'node.key' in files:
+                found_node_id = read_node_info_file(os.path.join(item, 'node.info'))
+                if found_node_id:
+                    if node_id is None or node_id == found_node_id:
+                        logger.debug("Found valid certificate pair for node %s", found_node_id)
+                        cert_pairs.append((found_node_id, os.path.join(item, 'node.crt'),
+                                           os.path.join(item, 'node.key')))
                             
         logger.debug(f"Found {len(cert_pairs)} certificate pairs in MAC directories")
         return cert_pairs
@@ -165,6 +250,31 @@ def find_by_mac_address(directory: Path, node_id: str = None) -> List[Tuple[str,
         logger.debug(f"Error in MAC directory search: {str(e)}")
         return []
 
+def _iter_node_cert_key(base_path, resolve: bool = False) -> Iterator[Tuple[str, str, str]]:
+    """
+    Yield (node_id, cert_path, key_path) for every node folder under base_path's
+    node_details directories that holds both files. With resolve, the paths are
+    made absolute with symlinks resolved.
+    """
+    # Find all node folders in node_details structure
+    node_folders = find_node_folders(base_path)
+    logger.debug(f"Found {len(node_folders)} node folders")
+
+    # Each folder costs a directory listing; overlap them across threads
+    for (node_id, folder_path), result in zip(node_folders, _scan_folders(node_folders)):
+        if isinstance(result, Exception):
+            logger.debug(f"Error processing node folder {folder_path}: {str(result)}")
+            click.echo(click.style(f"Error processing node folder {folder_path}: {str(result)}", fg='yellow'))
+            continue
+        crt_path, key_path = result
+        if crt_path and key_path:
+            logger.debug("Found valid certificate pair for node %s", node_id)
+            if resolve:
+                crt_path, key_path = os.path.realpath(crt_path), os.path.realpath(key_path)
+            yield node_id, crt_path, key_path
+        else:
+            logger.debug("Certificate files not found for node %s", node_id)
+
 @debug_step("Finding node certificate key pairs")
 def find_node_cert_key_pairs(base_path: str) -> List[Tuple[str, str, str]]:
     """
@@ -183,21 +293,8 @@ def find_node_cert_key_pairs(base_path: str) -> List[Tuple[str, str, str]]:
     logger.debug(f"Searching for certificate pairs in {base_path}")
     
     try:
-        # Find all node folders in node_details structure
-        node_folders = find_node_folders(base_path)
-        logger.debug(f"Found {len(node_folders)} node folders")
-
-        for node_id, folder_path in node_folders:
-            try:
-                crt_path, key_path = find_crt_key_files(folder_path)
-                if crt_path and key_path:
-                    logger.debug(f"Found valid certificate pair for node {node_id}")
-                    node_pairs.append((node_id, str(crt_path), str(key_path)))
-                else:
-                    logger.debug(f"Certificate files not found for node {node_id}")
-            except Exception as e:
-                logger.debug(f"Error processing node folder {folder_path}: {str(e)}")
-                click.echo(click.style(f"Error processing node folder {folder_path}: {str(e)}", fg='yellow'))
+        for node_pair in _iter_node_cert_key(base_path):
+            node_pairs.append(node_pair)
                 
     except Exception as e:
         logger.debug(f"Error accessing directory {base_path}: {str(e)}")
@@ -206,16 +303,35 @@ def find_node_cert_key_pairs(base_path: str) -> List[Tuple[str, str, str]]:
     logger.debug(f"Found {len(node_pairs)} total certificate pairs")
     return node_pairs
 
+@functools.lru_cache(maxsize=32)
+def _node_pair_index(base_path: str, signature: str) -> Dict[str, Tuple[str, str]]:
+    """
+    Map node_id -> (cert_path, key_path) under base_path, keeping the first pair found per node.
+    Cached per tree signature, so repeated lookups in an unchanged tree skip the walk
+    """
+    index = {}
+    for node_id, cert_path, key_path in find_node_cert_key_pairs(base_path):
+        index.setdefault(str(node_id), (cert_path, key_path))
+    return index
+
 @debug_step("Getting certificate and key paths")
-def get_cert_and_key_paths(base_path: str, node_id: str) -> Tuple[str, str]:
-    """Find certificate and key paths for a node."""
+def get_cert_and_key_paths(base_path: str, node_id: str,
+                           signature: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Find certificate and key paths for a node.
+    Callers that already fingerprinted base_path with tree_signature() can pass
+    it as signature; otherwise a recently computed one is reused.
+    """
     logger.debug(f"Searching for certificates for node {node_id} in {base_path}")
-    node_pairs = find_node_cert_key_pairs(base_path)
+    base_path = os.fspath(base_path)
+    if signature is None:
+        signature = _recent_tree_signature(base_path)
+    node_pairs = _node_pair_index(base_path, signature)
     
-    for nodeID, cert_path, key_path in node_pairs:
-        if str(nodeID) == str(node_id):
-            logger.debug(f"Found certificates for node {node_id}")
-            return cert_path, key_path
+    paths = node_pairs.get(str(node_id))
+    if paths is not None:
+        logger.debug(f"Found certificates for node {node_id}")
+        return paths
             
     logger.debug(f"No certificates found for node {node_id}")
     raise FileNotFoundError(f"Certificate and key not found for node {node_id}")
@@ -244,65 +360,91 @@ def get_root_cert_path(config_dir: Path) -> str:
 
 # ---------------
 
+# node-xxxxxx-node_id folder name in its usual form: node_id is everything after the 6th dash
+_NODE_DIR_RE = re.compile(r'node-(?:[^-]*-){5}(.*)', re.DOTALL)
+
+
+def _node_id_from_folder_name(dir_name: str) -> Optional[str]:
+    """Extract the node ID from a node-xxxxxx-node_id folder name, or None if it is not one."""
+    match = _NODE_DIR_RE.match(dir_name)
+    if match is not None:
+        return match.group(1)
+    # Names with fewer dashes: the node ID is the last dash-separated part
+    if dir_name.startswith("node-") and "-" in dir_name[6:]:
+        return dir_name.rsplit("-", 1)[-1]
+    return None
+
+
 def find_node_folders(base_path):
     """
     Search through base_path to find all node_details folders and then node-xxxxxx-node_id folders
-    Returns a list of tuples with (node_id, full_path)
+    Returns a list of tuples with (node_id, full_path), full_path being a str
     """
     node_folders = []
-    base_path = Path(base_path)
 
-    # Walk through the directory structure
-    for root, dirs, files in os.walk(base_path):
+    for root, dirs, _ in _scandir_walk(os.fspath(base_path)):
         # Check if current directory is node_details
-        if Path(root).name == "node_details":
+        if os.path.basename(root) == "node_details":
             # Look for node-xxxxxx-node_id folders
-            for dir_name in dirs:
-                if dir_name.startswith("node-") and "-" in dir_name[6:]:
-                    # Extract node_id (part after the 6th dash)
-                    node_id = dir_name.split("-", 6)[-1]
-                    full_path = Path(root) / dir_name
-                    node_folders.append((node_id, full_path))
+            for entry in dirs:
+                node_id = _node_id_from_folder_name(entry.name)
+                if node_id is not None:
+                    node_folders.append((node_id, entry.path))
 
     return node_folders
 
 
+# Threads listing node folders at once; the work is filesystem latency, not CPU
+SCAN_WORKERS = 32
+
+# Certificate and key file names in a node folder, in order of preference
+CRT_CANDIDATES = ("node.crt", "crt-node.crt", "certificate.crt")
+KEY_CANDIDATES = ("node.key", "key-node.key", "private.key")
+
+
+def _scan_crt_key_files(folder: str) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Pick the certificate and key files in folder from a single directory listing.
+    Returns (crt_path, key_path) as strings, with None for a missing file
+    """
+    with os.scandir(folder) as it:
+        files = {entry.name: entry.path for entry in it if entry.is_file()}
+    crt_path = next((files[name] for name in CRT_CANDIDATES if name in files), None)
+    key_path = next((files[name] for name in KEY_CANDIDATES if name in files), None)
+    return crt_path, key_path
+
+
+def _scan_folder(folder_path: str):
+    """_scan_crt_key_files for a worker thread: returns the exception instead of raising."""
+    try:
+        return _scan_crt_key_files(folder_path)
+    except Exception as e:
+        return e
+
+
+def _scan_folders(node_folders: List[Tuple[str, str]]) -> list:
+    """
+    Scan node folders for their certificate and key files in parallel, in input order.
+    Each result is (crt_path, key_path) or the exception raised for that folder
+    """
+    if len(node_folders) < 2:
+        return [_scan_folder(folder_path) for _, folder_path in node_folders]
+    with ThreadPoolExecutor(max_workers=min(SCAN_WORKERS, len(node_folders))) as executor:
+        return list(executor.map(_scan_folder, (folder_path for _, folder_path in node_folders)))
+
+
 def find_crt_key_files(folder_path):
     """
     Find certificate and key files in the node folder
     Returns (crt_path, key_path) or (None, None) if not found
     """
-    # List of possible certificate file names to check
-    crt_candidates = [
-        "node.crt",  # Primary candidate
-        "crt-node.crt",  # Fallback candidate
-        "certificate.crt",  # Additional fallback
-    ]
-
-    # List of possible key file names to check
-    key_candidates = [
-        "node.key",  # Primary candidate
-        "key-node.key",  # Fallback candidate
-        "private.key",  # Additional fallback
-    ]
-
-    # Check for certificate file
-    crt_path = None
-    for candidate in crt_candidates:
-        test_path = folder_path / candidate
-        if test_path.exists():
-            crt_path = test_path
-            break
-
-    # Check for key file
-    key_path = None
-    for candidate in key_candidates:
-        test_path = folder_path / candidate
-        if test_path.exists():
-            key_path = test_path
-            break
+    try:
+        crt_path, key_path = _scan_crt_key_files(os.fspath(folder_path))
+    except (FileNotFoundError, NotADirectoryError):
+        return None, None
 
-    return crt_path, key_path
+    return (Path(crt_path) if crt_path else None,
+            Path(key_path) if key_path else None)
 
 
 def find_node_cert_key_pairs_path(base_path):
@@ -312,26 +454,35 @@ def find_node_cert_key_pairs_path(base_path):
     Returns:
         list: List of tuples containing (node_id, cert_path, key_path)
     """
-    node_pairs = []
-    base_path = Path(base_path)
+    return list(_iter_node_cert_key(base_path, resolve=True))
 
-    # Find all node folders
-    nodes = find_node_folders(base_path)
-
-    for node_id, folder_path in nodes:
-        crt_path, key_path = find_crt_key_files(folder_path)
+def _find_any_cert_for_node(base_path: str, node_id: str) -> Optional[Tuple[str, str]]:
+    """
+    Find node_id's certificate and key under base_path in a single walk.
+    A directory holding node.info/node.crt/node.key for the node wins as soon as it
+    is seen; otherwise the first node-xxxxxx-node_id folder under a node_details
+    directory with both files is used. Returns (cert_path, key_path) or None
+    """
+    folder_match = None
+    for root, dirs, files in _scandir_walk(base_path):
+        # Directory with node.info naming the node next to its certificate files
+        if 'node.info' in files and 'node.crt' in files and 'node.key' in files:
+            if read_node_info_file(os.path.join(root, 'node.info')) == node_id:
+                logger.debug(f"Found certificates in node_details structure")
+                return os.path.join(root, 'node.crt'), os.path.join(root, 'node.key')
 
-        if crt_path and key_path:
-            # Convert paths to strings
-            node_pairs.append((
-                node_id,
-                str(crt_path.resolve()),
-                str(key_path.resolve())
-            ))
-        else:
-            print(f"Warning: Certificate files not found for node {node_id} in {folder_path}")
+        # Traditional node_details/node-xxxxxx-node_id folder, used if no direct match turns up
+        if folder_match is None and os.path.basename(root) == "node_details":
+            for entry in dirs:
+                if _node_id_from_folder_name(entry.name) == node_id:
+                    crt_path, key_path = find_crt_key_files(entry.path)
+                    if crt_path and key_path:
+                        folder_match = (str(crt_path), str(key_path))
+                        break
 
-    return node_pairs
+    if folder_match:
+        logger.debug(f"Found certificates in node folder")
+    return folder_match
 
 def get_cert_paths_from_direct_path(base_path: str, node_id: str) -> Tuple[str, str]:
     """
@@ -367,21 +518,9 @@ def get_cert_paths_from_direct_path(base_path: str, node_id: str) -> Tuple[str,
     # Method 2: Try node_details structure
     logger.debug("Trying node_details structure")
     try:
-        # First check if we're already in a node_details structure
-        cert_pairs = find_certificates_in_directory(base_path)
-        for found_node_id, cert_path, key_path in cert_pairs:
-            if found_node_id == node_id:
-                logger.debug(f"Found certificates in node_details structure")
-                return cert_path, key_path
-                
-        # If not found, try traditional node_details search
-        node_folders = find_node_folders(base_path)
-        for folder_node_id, folder_path in node_folders:
-            if folder_node_id == node_id:
-                crt_path, key_path = find_crt_key_files(folder_path)
-                if crt_path and key_path:
-                    logger.debug(f"Found certificates in node folder")
-                    return str(crt_path), str(key_path)
+        found = _find_any_cert_for_node(os.fspath(base_path), node_id)
+        if found:
+            return found
     except Exception as e:
         logger.debug(f"Error in node_details search: {str(e)}")
     
@@ -1,9 +1,26 @@
 """
 Configuration manager for MQTT CLI.
 """
+import os
 import json
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Dict, Optional, Tuple, List
+try:
+    import orjson
+except ImportError:  # Optional speed-up; stdlib json is used otherwise
+    orjson = None
+
+# orjson's decode error subclasses json.JSONDecodeError, so callers catch either
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _dumps(config: dict) -> bytes:
+    """Serialize the configuration as indented JSON."""
+    if orjson is not None:
+        return orjson.dumps(config, option=orjson.OPT_INDENT_2)
+    return json.dumps(config, indent=2).encode('utf-8')
+
 
 class ConfigManager:
     """Manages MQTT CLI configuration including broker and node details."""
@@ -14,22 +31,47 @@ class ConfigManager:
         """Initialize the configuration manager."""
         self.config_dir = Path(config_dir)
         self.config_file = self.config_dir / 'config.json'
-        self.config = {
-            'broker': self.DEFAULT_BROKER,
+        # Read from config.json on first access; node paths are checked on first node lookup
+        self._config: Optional[dict] = None
+        self._nodes_validated = False
+        # Nesting depth of batch() blocks, and whether a save was deferred by one
+        self._batch_depth = 0
+        self._dirty = False
+
+    @classmethod
+    def _default_config(cls) -> dict:
+        """Build a fresh default configuration."""
+        return {
+            'broker': cls.DEFAULT_BROKER,
             'nodes': {},  # node_id -> {'cert_path': str, 'key_path': str}
             'admin_cli_path': None,
             'cert_paths': []  # Support multiple certificate paths
         }
-        self._load()
-        
-        # Ensure all configured nodes have valid certificate paths
-        self._validate_node_paths()
+
+    @property
+    def config(self) -> dict:
+        """The configuration, loaded from file on first access."""
+        if self._config is None:
+            self._config = self._default_config()
+            self._load()
+        return self._config
+
+    @config.setter
+    def config(self, value: dict):
+        self._config = value
+
+    def _nodes(self) -> Dict[str, dict]:
+        """Configured nodes, dropping those whose certificate files are gone on first use."""
+        if not self._nodes_validated:
+            self._nodes_validated = True
+            self._validate_node_paths()
+        return self.config['nodes']
 
     def _load(self):
         """Load configuration from file."""
         if self.config_file.exists():
             try:
-                loaded_config = json.loads(self.config_file.read_text())
+                loaded_config = _loads(self.config_file.read_bytes())
                 self.config.update(loaded_config)
             except json.JSONDecodeError:
                 pass
@@ -39,29 +81,72 @@ class ConfigManager:
             self.config['nodes'] = {}
 
     def _save(self):
-        """Save configuration to file."""
+        """Save configuration to file, replacing it atomically; deferred inside batch()."""
+        if self._batch_depth:
+            self._dirty = True
+            return
+        self._dirty = False
         self.config_dir.mkdir(parents=True, exist_ok=True)
-        self.config_file.write_text(json.dumps(self.config, indent=2))
+        tmp_file = self.config_file.with_name(self.config_file.name + '.tmp')
+        tmp_file.write_bytes(_dumps(self.config))
+        os.replace(tmp_file, self.config_file)
+
+    @contextmanager
+    def batch(self):
+        """Group several changes into a single save when the outermost block exits.
+
+        Usage:
+            with config_manager.batch():
+                config_manager.set_broker(broker)
+                config_manager.set_cert_paths(paths)
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth and self._dirty:
+                self._save()
 
     def _validate_node_paths(self):
         """Validate and update node certificate paths."""
+        nodes = self.config['nodes']
+        # One directory listing answers the existence checks for every file in it
+        listings: Dict[str, Optional[set]] = {}
+
+        def exists(path: str) -> bool:
+            directory, name = os.path.split(path)
+            if directory not in listings:
+                try:
+                    with os.scandir(directory or '.') as it:
+                        listings[directory] = {entry.name for entry in it if entry.is_file()}
+                except (FileNotFoundError, NotADirectoryError):
+                    listings[directory] = set()
+                except OSError:
+                    # Unlistable but maybe searchable; fall back to stat per file
+                    listings[directory] = None
+            present = listings[directory]
+            return os.path.exists(path) if present is None else name in present
+
         invalid_nodes = []
-        for node_id, node_info in self.config['nodes'].items():
-            cert_path = Path(node_info['cert_path'])
-            key_path = Path(node_info['key_path'])
+        for node_id, node_info in nodes.items():
+            cert_path = node_info['cert_path']
+            key_path = node_info['key_path']
             
             # Check if paths exist
-            if not cert_path.exists() or not key_path.exists():
+            if not exists(cert_path) or not exists(key_path):
                 invalid_nodes.append(node_id)
                 continue
                 
-            # Update paths to be absolute
-            node_info['cert_path'] = str(cert_path.resolve())
-            node_info['key_path'] = str(key_path.resolve())
+            # Update paths to be absolute; saved entries already are, so this is rarely needed
+            if not os.path.isabs(cert_path):
+                node_info['cert_path'] = str(Path(cert_path).resolve())
+            if not os.path.isabs(key_path):
+                node_info['key_path'] = str(Path(key_path).resolve())
             
         # Remove invalid nodes
         for node_id in invalid_nodes:
-            del self.config['nodes'][node_id]
+            del nodes[node_id]
             
         if invalid_nodes:
             self._save()
@@ -102,8 +187,9 @@ class ConfigManager:
         """Get the Nodes's Certs path."""
         return self.config.get('admin_cli_path')
 
-    def add_node(self, node_id: str, cert_path: str, key_path: str):
-        """Add or update a node's certificate paths."""
+    @staticmethod
+    def _node_entry(cert_path: str, key_path: str) -> dict:
+        """Build a node's config entry, checking that its certificate files exist."""
         cert_path = Path(cert_path)
         key_path = Path(key_path)
         
@@ -112,15 +198,37 @@ class ConfigManager:
         if not key_path.exists():
             raise FileNotFoundError(f"Key file not found: {key_path}")
             
-        self.config['nodes'][node_id] = {
+        return {
             'cert_path': str(cert_path.resolve()),
             'key_path': str(key_path.resolve())
         }
+
+    def add_node(self, node_id: str, cert_path: str, key_path: str):
+        """Add or update a node's certificate paths."""
+        self.config['nodes'][node_id] = self._node_entry(cert_path, key_path)
         self._save()
 
+    def add_nodes(self, nodes: List[Tuple[str, str, str]]) -> Dict[str, str]:
+        """Add or update several nodes' certificate paths with a single save.
+        
+        Nodes whose certificate files are missing are skipped; returns their
+        node IDs mapped to the error.
+        """
+        entries = {}
+        skipped = {}
+        for node_id, cert_path, key_path in nodes:
+            try:
+                entries[node_id] = self._node_entry(cert_path, key_path)
+            except FileNotFoundError as e:
+                skipped[node_id] = str(e)
+        if entries:
+            self.config['nodes'].update(entries)
+            self._save()
+        return skipped
+
     def get_node_paths(self, node_id: str) -> Optional[Tuple[str, str]]:
         """Get certificate paths for a node."""
-        node_info = self.config['nodes'].get(node_id)
+        node_info = self._nodes().get(node_id)
         if node_info:
             cert_path = Path(node_info['cert_path'])
             key_path = Path(node_info['key_path'])
@@ -136,7 +244,7 @@ class ConfigManager:
 
     def list_nodes(self) -> Dict[str, dict]:
         """Get all configured nodes."""
-        return self.config['nodes']
+        return self._nodes()
 
     def remove_node(self, node_id: str) -> bool:
         """Remove a node's configuration."""
@@ -148,10 +256,5 @@ class ConfigManager:
 
     def reset(self):
         """Reset configuration to defaults."""
-        self.config = {
-            'broker': self.DEFAULT_BROKER,
-            'nodes': {},
-            'admin_cli_path': None,
-            'cert_paths': []
-        }
+        self.config = self._default_config()
         self._save() 
\ No newline at end of file
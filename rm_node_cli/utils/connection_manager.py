@@ -5,9 +5,33 @@ import os
 import json
 import logging
 import asyncio
+import functools
 from pathlib import Path
 from typing import Dict, Optional, List, Tuple
 from ..mqtt_operations import MQTTOperations
+try:
+    import orjson
+except ImportError:  # Optional speed-up; stdlib json is used otherwise
+    orjson = None
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+# Upper bound on node connects (TLS handshakes) in flight at once
+CONNECT_CONCURRENCY = 32
+
+# Seconds between full reconnect sweeps; dropped connections are reported as they happen
+RECONNECT_SWEEP_INTERVAL = 300
+
+# While background tasks run, state changes within this many seconds share one save
+SAVE_DEBOUNCE = 0.5
+
+
+def _dumps(data: dict) -> bytes:
+    """Serialize the connection state as compact JSON."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data).encode('utf-8')
+
 
 class ConnectionManager:
     """Manages MQTT client connections and their persistence."""
@@ -20,16 +44,21 @@ class ConnectionManager:
         self.logger = logging.getLogger(__name__)
         self._load()
         
-        # Background task for maintaining connections
+        # Background task for maintaining connections, fed by disconnect callbacks
         self.connection_task = None
         self.is_running = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reconnect_queue: Optional[asyncio.Queue] = None
+        # Debounced state saves; without the flusher every change saves immediately
+        self._flush_task = None
+        self._save_requested: Optional[asyncio.Event] = None
 
     def _load(self):
         """Load connection info from state file."""
         try:
             if self.state_file.exists():
-                with open(self.state_file, 'r') as f:
-                    data = json.load(f)
+                with open(self.state_file, 'rb') as f:
+                    data = _loads(f.read())
                     self.connection_info = data.get('connections', {})
                     self.active_node = data.get('active_node')
         except Exception as e:
@@ -38,17 +67,34 @@ class ConnectionManager:
             self.active_node = None
 
     def _save(self):
-        """Save connection info to state file."""
+        """Save connection info to state file, replacing it atomically."""
         try:
             data = {
                 'connections': self.connection_info,
                 'active_node': self.active_node
             }
-            with open(self.state_file, 'w') as f:
-                json.dump(data, f)
+            tmp_file = self.state_file.with_name(self.state_file.name + '.tmp')
+            with open(tmp_file, 'wb') as f:
+                f.write(_dumps(data))
+            os.replace(tmp_file, self.state_file)
         except Exception as e:
             self.logger.warning(f"Failed to save connection state: {str(e)}")
 
+    def _request_save(self):
+        """Save now, or let the flusher coalesce it with nearby changes when it is running."""
+        if self._save_requested is not None:
+            self._save_requested.set()
+        else:
+            self._save()
+
+    async def _flush_saves(self):
+        """Background task writing the state file once per burst of changes."""
+        while True:
+            await self._save_requested.wait()
+            await asyncio.sleep(SAVE_DEBOUNCE)
+            self._save_requested.clear()
+            self._save()
+
     async def connect_all_nodes(self) -> Tuple[int, int]:
         """
         Connect to all nodes concurrently.
@@ -59,17 +105,20 @@ class ConnectionManager:
         if not self.connection_info:
             return 0, 0
             
-        # Create tasks for all connections
-        connection_tasks = []
-        for node_id, info in self.connection_info.items():
-            task = self._connect_node(node_id, info)
-            connection_tasks.append(task)
-            
-        # Wait for all connections to complete
-        results = await asyncio.gather(*connection_tasks, return_exceptions=True)
+        # Connect every node, with at most CONNECT_CONCURRENCY handshakes in flight
+        semaphore = asyncio.Semaphore(CONNECT_CONCURRENCY)
+
+        async def connect_one(node_id: str, info: dict) -> bool:
+            async with semaphore:
+                return await self._connect_node(node_id, info)
+
+        results = await asyncio.gather(
+            *(connect_one(node_id, info) for node_id, info in list(self.connection_info.items())),
+            return_exceptions=True
+        )
         
         # Count successful connections
-        success_count = sum(1 for result in results if result)
+        success_count = sum(1 for result in results if result is True)
         return success_count, len(self.connection_info)
 
     async def _connect_node(self, node_id: str, info: dict) -> bool:
@@ -83,12 +132,23 @@ class ConnectionManager:
         Returns:
             bool: True if connection successful, False otherwise
         """
+        # Retire the client being replaced first: it would otherwise keep
+        # auto-reconnecting with the same client ID and the broker would keep
+        # kicking one of the two sessions
+        old_client = self.connections.pop(node_id, None)
+        if old_client is not None:
+            old_client.on_disconnect = None
+            try:
+                await old_client.disconnect_async()
+            except Exception as e:
+                self.logger.debug(f"Error disconnecting replaced client for {node_id}: {str(e)}")
         try:
             client = MQTTOperations(
                 broker=info['broker'],
                 node_id=node_id,
                 cert_path=info['cert_path'],
-                key_path=info['key_path']
+                key_path=info['key_path'],
+                on_disconnect=functools.partial(self._on_disconnect, node_id)
             )
             if await client.connect_async():
                 self.connections[node_id] = client
@@ -104,6 +164,10 @@ class ConnectionManager:
             return
             
         self.is_running = True
+        self._loop = asyncio.get_event_loop()
+        self._reconnect_queue = asyncio.Queue()
+        self._save_requested = asyncio.Event()
+        self._flush_task = asyncio.create_task(self._flush_saves())
         self.connection_task = asyncio.create_task(self._maintain_connections())
         
     async def stop_background_connections(self):
@@ -116,18 +180,49 @@ class ConnectionManager:
             except asyncio.CancelledError:
                 pass
             self.connection_task = None
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+            # Write out anything the flusher had not got to yet
+            pending, self._save_requested = self._save_requested, None
+            if pending.is_set():
+                self._save()
+
+    def _on_disconnect(self, node_id: str):
+        """Queue a dropped node for reconnection; called from the SDK's thread."""
+        loop, queue = self._loop, self._reconnect_queue
+        if loop is not None and queue is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(queue.put_nowait, node_id)
 
     async def _maintain_connections(self):
-        """Background task to maintain connections to all nodes."""
+        """Background task to reconnect nodes as they drop, with a periodic full sweep."""
+        # Start with a full sweep, then wait for drops or the next sweep
+        node_ids = set(self.connection_info)
         while self.is_running:
             try:
                 # Attempt to connect any disconnected nodes
-                for node_id, info in self.connection_info.items():
-                    if node_id not in self.connections or not self.connections[node_id].is_connected():
+                for node_id in node_ids:
+                    info = self.connection_info.get(node_id)
+                    if info is None:
+                        continue
+                    client = self.connections.get(node_id)
+                    if client is None or not client.is_connected():
                         await self._connect_node(node_id, info)
                 
-                # Wait before next check
-                await asyncio.sleep(30)  # Check every 30 seconds
+                try:
+                    node_ids = {await asyncio.wait_for(self._reconnect_queue.get(), RECONNECT_SWEEP_INTERVAL)}
+                    # Handle every drop reported meanwhile in the same pass
+                    while not self._reconnect_queue.empty():
+                        node_ids.add(self._reconnect_queue.get_nowait())
+                except asyncio.TimeoutError:
+                    # Sweep catches anything a callback missed
+                    node_ids = set(self.connection_info)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 self.logger.error(f"Error in connection maintenance: {str(e)}")
                 await asyncio.sleep(5)  # Short delay on error
@@ -150,7 +245,7 @@ class ConnectionManager:
             'key_path': str(key_path)
         }
         self.active_node = node_id
-        self._save()
+        self._request_save()
 
     async def remove_connection(self, node_id: str) -> bool:
         """Remove a connection."""
@@ -166,7 +261,7 @@ class ConnectionManager:
             if self.active_node == node_id:
                 self.active_node = None
             
-            self._save()
+            self._request_save()
             return True
         return False
 
@@ -190,10 +285,9 @@ class ConnectionManager:
 
     async def disconnect_all(self) -> dict:
         """Disconnect all connections."""
-        results = {}
-        for node_id in list(self.connections.keys()):
-            results[node_id] = await self.remove_connection(node_id)
-        return results
+        node_ids = list(self.connections.keys())
+        removed = await asyncio.gather(*(self.remove_connection(node_id) for node_id in node_ids))
+        return dict(zip(node_ids, removed))
 
     def list_connections(self) -> list:
         """List all stored connection information."""
@@ -203,7 +297,7 @@ class ConnectionManager:
         """Update broker URL for a connection."""
         if node_id in self.connection_info:
             self.connection_info[node_id]['broker'] = broker
-            self._save()
+            self._request_save()
             # Force reconnect with new broker
             if node_id in self.connections:
                 try:
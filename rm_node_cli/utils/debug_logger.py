@@ -14,12 +14,12 @@ def get_command_logger(command_name: str) -> logging.Logger:
 
 def debug_log(func: Callable) -> Callable:
     """Decorator to add debug logging to command functions."""
+    # Resolved once per decorated function rather than on every call
+    logger = get_command_logger(func.__module__.rsplit('.', 1)[-1])
+    signature = inspect.signature(func)
+    
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        # Get the command name from the function's module
-        command_name = func.__module__.split('.')[-1]
-        logger = get_command_logger(command_name)
-        
         # Get context object from args or kwargs
         ctx = next((arg for arg in args if hasattr(arg, 'obj')), None)
         if ctx is None and 'ctx' in kwargs:
@@ -30,7 +30,7 @@ def debug_log(func: Callable) -> Callable:
         
         if is_debug:
             # Log function call with arguments
-            func_args = inspect.signature(func).bind(*args, **kwargs)
+            func_args = signature.bind(*args, **kwargs)
             func_args.apply_defaults()
             # Filter out context object from logged arguments
             filtered_args = {k: v for k, v in func_args.arguments.items() 
@@ -53,12 +53,10 @@ def debug_log(func: Callable) -> Callable:
 def debug_step(message: str) -> Callable:
     """Decorator to log debug steps within functions."""
     def decorator(func: Callable) -> Callable:
+        logger = get_command_logger(func.__module__.rsplit('.', 1)[-1])
+        
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            # Get the command name from the function's module
-            command_name = func.__module__.split('.')[-1]
-            logger = get_command_logger(command_name)
-            
             # Get context object from args or kwargs
             ctx = next((arg for arg in args if hasattr(arg, 'obj')), None)
             if ctx is None and 'ctx' in kwargs:
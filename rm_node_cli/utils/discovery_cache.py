@@ -0,0 +1,63 @@
+"""
+Persistent cache of node discovery results per certificate path.
+
+A path's results stay valid while none of the directories under it has
+changed. Adding, removing or renaming a node folder or certificate file
+updates its parent directory's mtime; rewriting a file in place does not,
+so in-place edits of node.info are only picked up after such a change.
+Signatures come from cert_finder.tree_signature().
+"""
+import os
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Per-method discovery results for one path: a list of (node_id, cert_path, key_path) per method
+PathResults = List[List[Tuple[str, str, str]]]
+
+
+class DiscoveryCache:
+    """Discovery results keyed by certificate path, stored as JSON in the config directory."""
+
+    def __init__(self, cache_file: Path):
+        self.cache_file = Path(cache_file)
+        self._entries: Optional[Dict[str, dict]] = None
+        self._changed = False
+
+    def _load(self) -> Dict[str, dict]:
+        if self._entries is None:
+            self._entries = {}
+            try:
+                if self.cache_file.exists():
+                    self._entries = json.loads(self.cache_file.read_text())
+            except (OSError, ValueError) as e:
+                logger.debug(f"Ignoring unreadable discovery cache {self.cache_file}: {str(e)}")
+        return self._entries
+
+    def get(self, cert_path: str, signature: str) -> Optional[PathResults]:
+        """Return the cached results for ``cert_path`` if they were stored under ``signature``."""
+        entry = self._load().get(cert_path)
+        if entry is None or entry.get('signature') != signature:
+            return None
+        return [[tuple(node) for node in found] for found in entry['results']]
+
+    def put(self, cert_path: str, signature: str, results: PathResults):
+        """Remember ``results`` for ``cert_path`` as of ``signature``."""
+        self._load()[cert_path] = {'signature': signature, 'results': results}
+        self._changed = True
+
+    def save(self):
+        """Write the cache back if anything was stored since the last save."""
+        if not self._changed:
+            return
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_name(self.cache_file.name + '.tmp')
+            tmp_file.write_text(json.dumps(self._entries))
+            os.replace(tmp_file, self.cache_file)
+            self._changed = False
+        except OSError as e:
+            logger.debug(f"Error saving discovery cache {self.cache_file}: {str(e)}")
@@ -172,15 +172,14 @@ class RMNodeLogger:
         def error_monitor():
             while True:
                 try:
-                    error_info = self.error_queue.get(timeout=1)
+                    # Block until an error arrives; no periodic wakeups while idle
+                    error_info = self.error_queue.get()
                     if error_info is None:  # Shutdown signal
                         break
                     
                     # Process error
                     self._process_error(error_info)
                     
-                except queue.Empty:
-                    continue
                 except Exception as e:
                     # Log the error in the monitor itself
                     self.crash_logger.error(f"Error in error monitor: {str(e)}")
@@ -0,0 +1,316 @@
+"""
+Append-only journal for OTA job storage.
+
+Each store is a nested ``{node_id: {job_id: data}}`` dict persisted as one
+JSON snapshot per node (``<store>/<encoded node_id>.json``, see _shard_name)
+plus a JSON-lines log of
+the mutations made since those snapshots. Mutations append one short line
+instead of rewriting anything; the log is folded back into the snapshots on
+startup, on shutdown, every ``COMPACT_EVERY`` operations and on the first
+operation ``COMPACT_INTERVAL`` seconds after the last compaction, and only the
+nodes touched since the last compaction are rewritten. Compaction can be
+split so that the shard writes run on a worker thread: the log is rotated to
+``<store>.log.old`` first, so appends made meanwhile land in a fresh log.
+"""
+import os
+import json
+import mmap
+import hashlib
+import logging
+import threading
+import time
+from typing import Dict, Any, Optional, Set, Tuple
+from urllib.parse import quote
+
+try:
+    import orjson
+except ImportError:  # Optional speed-up; stdlib json is used otherwise
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# (shards to write or remove, live node IDs after a clear-all)
+PendingCompaction = Tuple[Dict[str, Optional[Dict[str, Any]]], Optional[Set[str]]]
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+def _dumps(entry: Dict[str, Any]) -> str:
+    """Serialize one log entry as a compact JSON line body."""
+    if orjson is not None:
+        return orjson.dumps(entry).decode('utf-8')
+    return json.dumps(entry, separators=(',', ':'))
+
+
+def _shard_name(node_id: str) -> str:
+    """File name of a node's snapshot shard.
+
+    The ID is percent-encoded so it cannot name a path outside the store, and a
+    hash of the raw ID is appended so IDs differing only in case do not collide
+    on case-insensitive filesystems. The raw ID is stored inside the shard.
+    """
+    digest = hashlib.blake2b(node_id.encode('utf-8'), digest_size=4).hexdigest()
+    return f"{quote(node_id, safe='')}-{digest}.json"
+
+
+def _read_snapshot(path: str) -> Dict[str, Any]:
+    """Parse a JSON snapshot, straight from a memory map when orjson is available."""
+    with open(path, 'rb') as f:
+        if orjson is None or os.fstat(f.fileno()).st_size == 0:
+            return json.load(f)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+            return orjson.loads(view)
+
+
+def _write_snapshot(path: str, data: Dict[str, Any]):
+    """Atomically replace ``path`` with ``data`` serialized as JSON."""
+    tmp_file = path + '.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_file, path)
+
+
+class OTAJournal:
+    """Per-node snapshots + append-only log persistence for one OTA store."""
+
+    # Fold the log into the snapshots after this many appended operations
+    COMPACT_EVERY = 10000
+    # ...or on the first operation this many seconds after the last compaction
+    COMPACT_INTERVAL = 300.0
+
+    def __init__(self, snapshot_file: str):
+        base = os.path.splitext(snapshot_file)[0]
+        # Single-file snapshot written by older versions; migrated on load
+        self.legacy_file = snapshot_file
+        self.snapshot_dir = base
+        self.log_file = base + '.log'
+        self.rotated_log_file = self.log_file + '.old'
+        self._log = None
+        # Guards the log handle and dirty tracking against the MQTT callback thread
+        self._lock = threading.Lock()
+        # Held from begin_compaction() until write_compaction() finishes
+        self._compact_lock = threading.Lock()
+        self._ops = 0
+        self._last_compaction = time.monotonic()
+        self._dirty: Set[str] = set()
+        self._cleared_all = False
+        # Raw-node-ID shard files still to be replaced by encoded ones
+        self._legacy_shards: Set[str] = set()
+
+    @property
+    def needs_compaction(self) -> bool:
+        """True once enough operations, or enough time, have passed since the last compaction."""
+        if self._ops >= self.COMPACT_EVERY:
+            return True
+        return self._ops > 0 and time.monotonic() - self._last_compaction >= self.COMPACT_INTERVAL
+
+    def _shard_path(self, node_id: str) -> str:
+        return os.path.join(self.snapshot_dir, _shard_name(node_id))
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Load the snapshots, replay the log on top of them and return the result."""
+        data: Dict[str, Dict[str, Any]] = {}
+        migrated = False
+        try:
+            if os.path.exists(self.legacy_file):
+                data = _read_snapshot(self.legacy_file)
+                self._dirty.update(data)
+                migrated = True
+        except Exception as e:
+            logger.debug(f"Error loading OTA snapshot {self.legacy_file}: {str(e)}")
+
+        try:
+            if os.path.isdir(self.snapshot_dir):
+                with os.scandir(self.snapshot_dir) as it:
+                    for entry in it:
+                        if not entry.name.endswith('.json'):
+                            continue
+                        try:
+                            shard = _read_snapshot(entry.path)
+                            if not isinstance(shard, dict):
+                                raise ValueError("not a JSON object")
+                        except Exception as e:
+                            self._quarantine_shard(entry.path, e)
+                            continue
+                        if shard.keys() == {'node_id', 'jobs'}:
+                            data[shard['node_id']] = shard['jobs']
+                        else:
+                            # Shard named by the raw node ID, as older versions wrote them
+                            node_id = entry.name[:-5]
+                            data[node_id] = shard
+                            self._dirty.add(node_id)
+                            self._legacy_shards.add(entry.path)
+        except Exception as e:
+            logger.debug(f"Error loading OTA snapshots in {self.snapshot_dir}: {str(e)}")
+
+        replayed = 0
+        # A rotated log is left behind only by an interrupted compaction
+        for log_file in (self.rotated_log_file, self.log_file):
+            try:
+                if os.path.exists(log_file):
+                    with open(log_file, 'r') as f:
+                        for line in f:
+                            try:
+                                self._apply(data, _loads(line))
+                                replayed += 1
+                            except (ValueError, KeyError, TypeError):
+                                # A torn final line from an interrupted write
+                                logger.debug(f"Skipping unreadable entry in {log_file}")
+            except Exception as e:
+                logger.debug(f"Error replaying OTA log {log_file}: {str(e)}")
+
+        if replayed or migrated or self._legacy_shards:
+            self.compact(data)
+            if migrated and not self._dirty:
+                try:
+                    os.remove(self.legacy_file)
+                except OSError as e:
+                    logger.debug(f"Error removing {self.legacy_file}: {str(e)}")
+        return data
+
+    def _quarantine_shard(self, path: str, error: Exception):
+        """Move an unreadable shard aside as ``*.corrupt``.
+
+        Its node is then simply absent from the store; a later compaction writes
+        a fresh shard for it instead of overwriting the jobs that may still be
+        recoverable from the moved file.
+        """
+        logger.warning(f"Unreadable OTA snapshot {path}, moving it aside: {str(error)}")
+        try:
+            os.replace(path, path + '.corrupt')
+        except OSError as e:
+            logger.debug(f"Error moving {path} aside: {str(e)}")
+
+    def _apply(self, data: Dict[str, Dict[str, Any]], entry: Dict[str, Any]):
+        """Apply a single log entry to the in-memory store."""
+        op = entry['op']
+        node_id = entry.get('node')
+        if op == 'put':
+            data.setdefault(node_id, {})[entry['job']] = entry['data']
+        elif op == 'del':
+            jobs = data.get(node_id)
+            if jobs is not None:
+                jobs.pop(entry['job'], None)
+                if not jobs:
+                    del data[node_id]
+        elif op == 'clear':
+            if node_id is None:
+                data.clear()
+                self._cleared_all = True
+            else:
+                data.pop(node_id, None)
+        if node_id is not None:
+            self._dirty.add(node_id)
+
+    def _append(self, entry: Dict[str, Any]):
+        """Append one entry to the log, opening the log on first use."""
+        node_id = entry.get('node')
+        line = _dumps(entry) + '\n'
+        with self._lock:
+            if node_id is None:
+                self._cleared_all = True
+            else:
+                self._dirty.add(node_id)
+            try:
+                if self._log is None:
+                    self._log = open(self.log_file, 'a')
+                self._log.write(line)
+                self._log.flush()
+                self._ops += 1
+            except Exception as e:
+                logger.debug(f"Error appending to OTA log {self.log_file}: {str(e)}")
+
+    def put(self, node_id: str, job_id: str, data: Dict[str, Any]):
+        """Record that a job was stored or replaced."""
+        self._append({'op': 'put', 'node': node_id, 'job': job_id, 'data': data})
+
+    def delete(self, node_id: str, job_id: str):
+        """Record that a job was removed."""
+        self._append({'op': 'del', 'node': node_id, 'job': job_id})
+
+    def clear(self, node_id: Optional[str] = None):
+        """Record that one node's jobs, or all jobs, were removed."""
+        self._append({'op': 'clear', 'node': node_id})
+
+    def begin_compaction(self, data: Dict[str, Dict[str, Any]],
+                         blocking: bool = True) -> Optional[PendingCompaction]:
+        """Capture the changed shards of ``data`` and rotate the log.
+
+        This part is cheap and must run on the thread that owns ``data``; the
+        result is handed to write_compaction(), which may run anywhere. Returns
+        None without blocking if another compaction is still being written.
+        """
+        if not self._compact_lock.acquire(blocking):
+            return None
+        try:
+            with self._lock:
+                shards = {node_id: dict(data[node_id]) if data.get(node_id) else None
+                          for node_id in self._dirty}
+                live = {_shard_name(node_id) for node_id in data} if self._cleared_all else None
+                if self._log is not None:
+                    self._log.close()
+                    self._log = None
+                if os.path.exists(self.log_file):
+                    if os.path.exists(self.rotated_log_file):
+                        # A previous write failed; keep its entries ahead of ours
+                        with open(self.log_file, 'r') as src, open(self.rotated_log_file, 'a') as dst:
+                            dst.write(src.read())
+                        os.remove(self.log_file)
+                    else:
+                        os.replace(self.log_file, self.rotated_log_file)
+                self._ops = 0
+                self._last_compaction = time.monotonic()
+                self._dirty.clear()
+                self._cleared_all = False
+            return shards, live
+        except Exception as e:
+            self._compact_lock.release()
+            logger.debug(f"Error starting compaction of {self.snapshot_dir}: {str(e)}")
+            return None
+
+    def write_compaction(self, pending: PendingCompaction):
+        """Write the shards captured by begin_compaction() and drop the rotated log."""
+        shards, live = pending
+        try:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            if live is not None:
+                # Drop shards of every node that no longer has jobs
+                with os.scandir(self.snapshot_dir) as it:
+                    for entry in it:
+                        if entry.name.endswith('.json') and entry.name not in live:
+                            os.remove(entry.path)
+            for node_id, jobs in shards.items():
+                shard = self._shard_path(node_id)
+                if jobs:
+                    _write_snapshot(shard, {'node_id': node_id, 'jobs': jobs})
+                elif os.path.exists(shard):
+                    os.remove(shard)
+            for legacy in list(self._legacy_shards):
+                if os.path.exists(legacy):
+                    os.remove(legacy)
+                self._legacy_shards.discard(legacy)
+            if os.path.exists(self.rotated_log_file):
+                os.remove(self.rotated_log_file)
+        except Exception as e:
+            # The rotated log is kept, so the next load replays these changes
+            with self._lock:
+                self._dirty.update(shards)
+                if live is not None:
+                    self._cleared_all = True
+            logger.debug(f"Error compacting OTA store {self.snapshot_dir}: {str(e)}")
+        finally:
+            self._compact_lock.release()
+
+    def compact(self, data: Dict[str, Dict[str, Any]]):
+        """Rewrite the snapshots of nodes changed since the last compaction and truncate the log."""
+        pending = self.begin_compaction(data)
+        if pending is not None:
+            self.write_compaction(pending)
+
+    def close(self, data: Dict[str, Dict[str, Any]]):
+        """Compact ``data`` into the snapshots and release the log file."""
+        self.compact(data)
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
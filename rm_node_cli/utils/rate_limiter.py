@@ -0,0 +1,50 @@
+"""
+Token-bucket rate limiter for asyncio code.
+"""
+import asyncio
+import time
+from typing import Optional
+
+
+class AsyncRateLimiter:
+    """Allow at most ``rate`` acquisitions per ``period`` seconds.
+
+    Up to ``rate`` acquisitions go through at once; after that callers wait
+    only as long as it takes for the next token to refill.
+
+    Usage:
+        limiter = AsyncRateLimiter(300)
+        async with limiter:
+            await client.subscribe_async(topic)
+    """
+
+    def __init__(self, rate: float, period: float = 1.0):
+        self.rate = rate
+        self.period = period
+        self._tokens = float(rate)
+        self._updated = time.monotonic()
+        # Created on first use so it binds to the running loop
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.period)
+        self._updated = now
+
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) * self.period / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
@@ -33,6 +33,9 @@ setup(
         'rm_node_cli': ['configs/*.json'],
     },
     install_requires=read_requirements(),
+    extras_require={
+        'speedups': ['orjson>=3.6', 'uvloop>=0.14; sys_platform != "win32"'],
+    },
     entry_points={
         'console_scripts': [
             'rm-node=rm_node_cli.rmnode_cli:main',